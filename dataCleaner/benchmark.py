@@ -0,0 +1,357 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import leagueData
+import weeklyStats
+from boxScores import COUNTING_STATS, aggregate_box_scores
+from headToHead import category_directions, compare_categories
+from matchupData import TEAM_SLOTS, load_team_weeks, team_weeks_to_dict
+from statsStore import StatsStore, TeamWeekStats
+
+STATS = ['FG%', 'FT%', '3PTM', 'PTS', 'REB', 'AST', 'ST', 'BLK', 'TO']
+
+def generate_matchup_csv(path, teams=20, weeks=25, seasons=10, seed=0):
+    # Synthetic export in Yahoo's matchup layout, weeks numbered consecutively across seasons
+    rng = np.random.default_rng(seed)
+    team_names = [f'Team {i}' for i in range(1, teams+1)]
+    rows = []
+    for week in range(1, weeks*seasons+1):
+        order = rng.permutation(teams)
+        for a, b in zip(order[0::2], order[1::2]):
+            row = {'Week': week}
+            for slot, team in zip(TEAM_SLOTS, (a, b)):
+                row[f'{slot} ID'] = f'428.l.17058.t.{team+1}'
+                row[f'{slot} Name'] = team_names[team]
+            row.update({'Complete': True, 'Playoff': False, 'Consolation': False})
+            for slot in TEAM_SLOTS:
+                row[f'{slot} Points'] = rng.integers(0, 10)
+                row[f'{slot} FG%'] = round(rng.uniform(0.40, 0.50), 3)
+                row[f'{slot} FT%'] = round(rng.uniform(0.70, 0.85), 3)
+                for stat, (low, high) in {'3PTM': (30, 70), 'PTS': (350, 550), 'REB': (130, 220), 'AST': (70, 130),
+                                          'ST': (20, 40), 'BLK': (10, 30), 'TO': (40, 75)}.items():
+                    row[f'{slot} {stat}'] = rng.integers(low, high)
+            rows.append(row)
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+def generate_box_scores(teams=20, weeks=25, seasons=10, players=13, days=7, seed=0):
+    # Synthetic per-player daily lines, every player of every team playing every day
+    rng = np.random.default_rng(seed)
+    n_weeks = weeks * seasons
+    team_codes = np.repeat(np.arange(teams), players)
+    rows = len(team_codes) * n_weeks * days
+    box_scores = pd.DataFrame({
+        'Week': np.repeat(np.arange(1, n_weeks + 1), len(team_codes) * days),
+        'Team': np.array([f'Team {i}' for i in range(1, teams+1)])[np.tile(team_codes, n_weeks * days)],
+        'Player': np.array([f'Player {i}' for i in range(teams * players)])[np.tile(np.arange(teams * players), n_weeks * days)],
+    })
+    for stat in COUNTING_STATS:
+        box_scores[stat] = rng.integers(0, 12, rows)
+    box_scores['FGM'] = np.minimum(box_scores['FGM'], box_scores['FGA'])
+    box_scores['FTM'] = np.minimum(box_scores['FTM'], box_scores['FTA'])
+    return box_scores
+
+def legacy_import(pathToCsv, stats):
+    # Row by row loader that LeagueData and weeklyStats used before the columnar path
+    df = pd.read_csv(pathToCsv)
+    team_names = set(df['Team 1 Name'].unique()) | set(df['Team 2 Name'].unique())
+    team_data = {team: {} for team in team_names}
+    for _, row in df.iterrows():
+        week = row['Week']
+        for slot in TEAM_SLOTS:
+            team_data[row[f'{slot} Name']][week] = {stat: row[f'{slot} {stat}'] for stat in stats}
+    return team_data
+
+def columnar_import(pathToCsv, stats):
+    return team_weeks_to_dict(load_team_weeks(pathToCsv, stats), stats)
+
+def legacy_compare(team_data, stats):
+    # Team against opponent triple loop that weeklyStats used before the shared kernel
+    team_names = list(team_data)
+    weeks = {week for stats_per_week in team_data.values() for week in stats_per_week}
+    wins = {}
+    for week in weeks:
+        for team in team_names:
+            if week not in team_data[team]:
+                continue
+            team_stats = team_data[team][week]
+            for opponent in team_names:
+                if opponent == team or week not in team_data[opponent]:
+                    continue
+                opponent_stats = team_data[opponent][week]
+                won = int(team_stats['TO'] < opponent_stats['TO'])
+                won += sum(1 for stat in stats if stat != 'TO' and team_stats[stat] > opponent_stats[stat])
+                wins[(team, opponent, week)] = won
+    return wins
+
+def broadcast_compare(stats_array, directions):
+    # Single (teams x teams x weeks x categories) comparison, the first NumPy version in LeagueData
+    oriented = stats_array * directions
+    return (oriented[:, None] > oriented[None, :]).sum(axis=-1)
+
+def legacy_all_wins(rankings, team_names):
+    # Pairwise list.index lookups that weeklyStats.getAllWins used before the rank position table
+    winningSets = {team: set() for team in team_names}
+    for team in team_names:
+        for other_team in team_names:
+            if team == other_team:
+                continue
+            team_count = sum(rankings[stat].index(team) < rankings[stat].index(other_team) for stat in rankings)
+            other_count = sum(rankings[stat].index(other_team) < rankings[stat].index(team) for stat in rankings)
+            if team_count > other_count:
+                winningSets[team].add(other_team)
+    return winningSets
+
+def allocated_bytes(function, *args):
+    # Memory still held by what function returns
+    tracemalloc.start()
+    result = function(*args)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+def array_store(team_weeks, stats):
+    team_codes, team_order = pd.factorize(team_weeks['Team'])
+    store = StatsStore.from_lines(team_order.tolist(), team_codes, team_weeks['Week'].to_numpy(), team_weeks[stats].to_numpy())
+    return TeamWeekStats(store, stats)
+
+def best_time(function, *args, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def benchmark_ingestion(teams, weeks, seasons, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'matchups.csv')
+        generate_matchup_csv(path, teams, weeks, seasons)
+        legacy = best_time(legacy_import, path, STATS, repeat=repeat)
+        columnar = best_time(columnar_import, path, STATS, repeat=repeat)
+
+    print(f"Ingestion, {teams} teams x {weeks} weeks x {seasons} seasons")
+    print(f"  iterrows: {legacy:.3f}s")
+    print(f"  columnar: {columnar:.3f}s ({legacy / columnar:.1f}x)")
+
+def benchmark_snapshot(teams, weeks, seasons, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'matchups.csv')
+        cache_dir = os.path.join(directory, 'snapshots')
+        generate_matchup_csv(path, teams, weeks, seasons)
+        cold = best_time(lambda: leagueData.LeagueData(cacheSize=0).import_data(path), repeat=repeat)
+        leagueData.LeagueData(cacheSize=0).import_data(path, cache_dir)
+        warm = best_time(lambda: leagueData.LeagueData(cacheSize=0).import_data(path, cache_dir), repeat=repeat)
+
+    print(f"Snapshot import, {teams} teams x {weeks} weeks x {seasons} seasons")
+    print(f"  cold CSV parse: {cold:.3f}s")
+    print(f"  warm snapshot:  {warm:.3f}s ({cold / warm:.1f}x)")
+
+def benchmark_kernel(teams, weeks, seasons, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'matchups.csv')
+        generate_matchup_csv(path, teams, weeks, seasons)
+        team_weeks = load_team_weeks(path, STATS)
+
+    team_data = team_weeks_to_dict(team_weeks, STATS)
+    team_codes, team_order = pd.factorize(team_weeks['Team'])
+    week_codes, week_order = pd.factorize(team_weeks['Week'], sort=True)
+    stats_array = np.full((len(team_order), len(week_order), len(STATS)), np.nan)
+    stats_array[team_codes, week_codes] = team_weeks[STATS].to_numpy()
+    directions = category_directions(STATS)
+
+    legacy = best_time(legacy_compare, team_data, STATS, repeat=repeat)
+    broadcast = best_time(broadcast_compare, stats_array, directions, repeat=repeat)
+    kernel = best_time(compare_categories, stats_array, directions, repeat=repeat)
+
+    print(f"Category comparison, {teams} teams x {weeks} weeks x {seasons} seasons")
+    print(f"  python loops: {legacy:.3f}s")
+    print(f"  broadcast:    {broadcast:.4f}s ({legacy / broadcast:.0f}x)")
+    print(f"  kernel:       {kernel:.4f}s ({legacy / kernel:.0f}x)")
+
+def benchmark_all_wins(team_counts, repeat):
+    rng = np.random.default_rng(0)
+
+    print("weeklyStats.getAllWins scaling")
+    for teams in team_counts:
+        team_names = {f'Team {i}' for i in range(teams)}
+        team_data = {team: {1: {stat: rng.integers(0, 1000) for stat in weeklyStats.STATS}} for team in team_names}
+        rankings = weeklyStats.get_rankings(team_data, 1)
+
+        legacy = best_time(legacy_all_wins, rankings, team_names, repeat=repeat)
+        rank_table = best_time(weeklyStats.getAllWins, rankings, team_names, repeat=repeat)
+        print(f"  {teams:4d} teams: list.index {legacy:.4f}s, rank table {rank_table:.4f}s ({legacy / rank_table:.0f}x)")
+
+def benchmark_memory(teams, weeks, seasons):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'matchups.csv')
+        generate_matchup_csv(path, teams, weeks, seasons)
+        team_weeks = load_team_weeks(path, STATS)
+
+    nested = allocated_bytes(team_weeks_to_dict, team_weeks, STATS)
+    compact = allocated_bytes(array_store, team_weeks, STATS)
+
+    print(f"statsByTeamPerWeek memory, {teams} teams x {weeks} weeks x {seasons} seasons")
+    print(f"  dict of dicts: {nested / 2**20:.2f} MiB")
+    print(f"  array store:   {compact / 2**20:.2f} MiB ({nested / compact:.0f}x smaller)")
+
+def time_grid_case(teams, weeks, seasons, repeat):
+    # Timings of every LeagueData and weeklyStats stage for one synthetic archive
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'matchups.csv')
+        generate_matchup_csv(path, teams, weeks, seasons)
+
+        # Query cache off so the rankings are computed on every call
+        league = leagueData.LeagueData(cacheSize=0)
+        timings = {
+            'leagueData.read_matchups': best_time(load_team_weeks, path, leagueData.STATS, repeat=repeat),
+            'leagueData.import_data': best_time(league.import_data, path, repeat=repeat),
+            'leagueData.import_data_chunked': best_time(leagueData.LeagueData(cacheSize=0).import_data, path, None,
+                                                        max(teams // 2 * weeks, 1), repeat=repeat),
+        }
+        # Warm start: the first import writes the snapshot, the timed ones load it
+        cache_dir = os.path.join(directory, 'snapshots')
+        leagueData.LeagueData(cacheSize=0).import_data(path, cache_dir)
+        timings['leagueData.import_data_snapshot'] = best_time(
+            lambda: leagueData.LeagueData(cacheSize=0).import_data(path, cache_dir), repeat=repeat)
+        weekly_lines = load_team_weeks(path, weeklyStats.STATS)
+
+    box_scores = generate_box_scores(teams, weeks, seasons)
+    timings['boxScores.aggregate_box_scores'] = best_time(aggregate_box_scores, box_scores, leagueData.STATS, repeat=repeat)
+    timings['leagueData.import_box_scores'] = best_time(leagueData.LeagueData(cacheSize=0).import_box_scores, box_scores,
+                                                        repeat=repeat)
+
+    league_weeks = sorted(league.weeks)
+    pairs = list(league.headToHeadResults)
+    timings['leagueData.head_to_head'] = best_time(league._importAllHeadToHeadResults, repeat=repeat)
+    timings['leagueData.get_wins_ranking'] = best_time(
+        lambda: [league.get_wins_ranking(week) for week in league_weeks], repeat=repeat)
+    timings['leagueData.get_average_stats_ranking'] = best_time(
+        lambda: [league.get_average_stats_ranking(week) for week in league_weeks], repeat=repeat)
+    timings['leagueData.get_average_stats_ranking_season'] = best_time(league.get_average_stats_ranking, repeat=repeat)
+    def season_average_ranking():
+        # Includes building the prefix sums, which later window queries reuse
+        league._seasonMetrics = None
+        return league.get_season_average_ranking()
+
+    timings['leagueData.get_season_average_ranking'] = best_time(season_average_ranking, repeat=repeat)
+    timings['leagueData.get_form_ranking'] = best_time(
+        lambda: [league.get_form_ranking(3, week) for week in league_weeks], repeat=repeat)
+    timings['leagueData.get_head_to_head_summary'] = best_time(
+        lambda: [league.get_head_to_head_summary(*pair) for pair in pairs], repeat=repeat)
+    scenarios = [{'PTS': delta, 'TO': -delta / 10} for delta in range(-50, 50)]
+    timings['leagueData.what_if_batch_100'] = best_time(league.what_if_batch, league.teamOrder[0], scenarios, repeat=repeat)
+
+    team_codes, team_order = pd.factorize(weekly_lines['Team'])
+    store = StatsStore.from_lines(team_order.tolist(), team_codes, weekly_lines['Week'].to_numpy(),
+                                  weekly_lines[weeklyStats.STATS].to_numpy())
+    team_data = TeamWeekStats(store, weeklyStats.STATS)
+    team_names = set(store.teamOrder)
+    rankings = {week: weeklyStats.get_rankings(team_data, week) for week in store.weekOrder}
+    timings['weeklyStats.get_rankings'] = best_time(
+        lambda: [weeklyStats.get_rankings(team_data, week) for week in store.weekOrder], repeat=repeat)
+    timings['weeklyStats.get_team_wins_summary'] = best_time(
+        lambda: [weeklyStats.get_team_wins_summary(ranking, team_names) for ranking in rankings.values()], repeat=repeat)
+    timings['weeklyStats.compare_categories'] = best_time(
+        compare_categories, store.statsArray, category_directions(weeklyStats.STATS), repeat=repeat)
+
+    return [{'case': case, 'teams': teams, 'weeks': weeks, 'seasons': seasons, 'seconds': seconds}
+            for case, seconds in timings.items()]
+
+def benchmark_grid(team_counts, week_counts, season_counts, repeat):
+    records = []
+    for teams, weeks, seasons in itertools.product(team_counts, week_counts, season_counts):
+        case_records = time_grid_case(teams, weeks, seasons, repeat)
+        print(f"{teams} teams x {weeks} weeks x {seasons} seasons")
+        for record in case_records:
+            print(f"  {record['case']:45s} {record['seconds']:.4f}s")
+        records.extend(case_records)
+    return records
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_results(path, records, repeat):
+    results = {
+        'commit': _git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': records,
+    }
+    with open(path, 'w') as stream:
+        json.dump(results, stream, indent=2)
+
+def compare_results(baseline_path, records, threshold):
+    # Ratio against a previous results file; returns the cases slower than threshold times the baseline
+    with open(baseline_path, 'r') as stream:
+        baseline = json.load(stream)
+    key = lambda record: (record['case'], record['teams'], record['weeks'], record['seasons'])
+    previous = {key(record): record['seconds'] for record in baseline['results']}
+
+    regressions = []
+    print(f"Compared with {baseline.get('commit') or baseline_path}")
+    for record in records:
+        before = previous.get(key(record))
+        if not before:
+            continue
+        ratio = record['seconds'] / before
+        if ratio > threshold:
+            regressions.append((record, ratio))
+        print(f"  {record['case']:45s} {record['teams']}x{record['weeks']}x{record['seasons']}: {ratio:.2f}x"
+              + ("  REGRESSION" if ratio > threshold else ""))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the dataCleaner analyses on synthetic matchup CSVs")
+    subparsers = parser.add_subparsers(dest='command')
+
+    grid = subparsers.add_parser('grid', help="time every analysis stage over a grid of league sizes")
+    grid.add_argument('--teams', type=int, nargs='+', default=[10, 20])
+    grid.add_argument('--weeks', type=int, nargs='+', default=[20])
+    grid.add_argument('--seasons', type=int, nargs='+', default=[1, 5])
+    grid.add_argument('--repeat', type=int, default=3)
+    grid.add_argument('--output', default='benchmark_results.json', help="machine-readable results")
+    grid.add_argument('--compare', default=None, help="results file of an earlier run to compare against")
+    grid.add_argument('--threshold', type=float, default=1.2, help="slowdown ratio reported as a regression")
+
+    legacy = subparsers.add_parser('legacy', help="compare the current code paths with the ones they replaced")
+    legacy.add_argument('--teams', type=int, default=20)
+    legacy.add_argument('--weeks', type=int, default=25)
+    legacy.add_argument('--seasons', type=int, default=10)
+    legacy.add_argument('--repeat', type=int, default=3)
+    legacy.add_argument('--league-sizes', type=int, nargs='+', default=[10, 25, 50, 100, 200])
+    args = parser.parse_args()
+
+    if args.command == 'legacy':
+        benchmark_ingestion(args.teams, args.weeks, args.seasons, args.repeat)
+        benchmark_snapshot(args.teams, args.weeks, args.seasons, args.repeat)
+        benchmark_kernel(args.teams, args.weeks, args.seasons, args.repeat)
+        benchmark_all_wins(args.league_sizes, args.repeat)
+        benchmark_memory(args.teams, args.weeks, args.seasons)
+    elif args.command == 'grid':
+        records = benchmark_grid(args.teams, args.weeks, args.seasons, args.repeat)
+        write_results(args.output, records, args.repeat)
+        print(f"Results written to {args.output}")
+        if args.compare and compare_results(args.compare, records, args.threshold):
+            sys.exit(1)
+    else:
+        parser.print_help()
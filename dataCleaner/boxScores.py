@@ -0,0 +1,68 @@
+from lazyImport import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Counting columns of a per-player daily box score line
+COUNTING_STATS = ['FGM', 'FGA', 'FTM', 'FTA', '3PTM', 'PTS', 'REB', 'AST', 'ST', 'BLK', 'TO']
+# Percentage categories are made / attempted over the whole group, never an average of daily percentages
+PERCENTAGES = {'FG%': ('FGM', 'FGA'), 'FT%': ('FTM', 'FTA')}
+TEAM_WEEK = ['Team', 'Week']
+PLAYER_WEEK = ['Team', 'Player', 'Week']
+
+def box_score_dtypes():
+    dtypes = {'Week': np.int64, 'Date': str, 'Team': str, 'Player': str}
+    for stat in COUNTING_STATS:
+        dtypes[stat] = np.float64
+    return dtypes
+
+def read_box_scores(pathToCsv, **read_csv_kwargs):
+    # One row per player and day with a Date and/or Week column; other columns of the export are skipped
+    dtypes = box_score_dtypes()
+    return pd.read_csv(pathToCsv, usecols=lambda column: column in dtypes, dtype=dtypes, **read_csv_kwargs)
+
+def as_box_scores(source):
+    # Accept a DataFrame, an iterable of dicts or a path to a box score CSV; the columns get the dtypes
+    # read_box_scores uses, so e.g. integer counts are summed and divided as floats whatever the input
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        return read_box_scores(source)
+    box_scores = source if isinstance(source, pd.DataFrame) else pd.DataFrame(list(source))
+    return box_scores.astype({column: dtype for column, dtype in box_score_dtypes().items()
+                              if column in box_scores.columns})
+
+def box_score_weeks(box_scores, seasonStart=None):
+    # Week numbers of the rows: the Week column, or else 7 day weeks counted from seasonStart (week 1)
+    if 'Week' in box_scores.columns:
+        return box_scores['Week'].to_numpy(dtype=np.int64)
+    if seasonStart is None:
+        raise ValueError("Box scores without a Week column need a seasonStart date")
+    days = (pd.to_datetime(box_scores['Date']) - pd.Timestamp(seasonStart)).dt.days.to_numpy()
+    return days // 7 + 1
+
+def aggregate_box_scores(box_scores, stats, keys=TEAM_WEEK, seasonStart=None):
+    # Sum the counting columns per keys (team-week lines by default, PLAYER_WEEK for player lines) and
+    # derive the percentage categories from the summed makes and attempts. Returns keys + stats columns,
+    # the team-week layout melt_matchups produces; a group without attempts gets 0 for that percentage.
+    stats = list(stats)
+    needed = set()
+    for stat in stats:
+        needed.update(PERCENTAGES.get(stat, (stat,)))
+    missing = sorted(needed - set(COUNTING_STATS))
+    if missing:
+        raise ValueError(f"Box scores cannot provide {', '.join(missing)}")
+    counting = [stat for stat in COUNTING_STATS if stat in needed]
+    missing = [column for column in counting + [key for key in keys if key != 'Week'] if column not in box_scores.columns]
+    if missing:
+        raise ValueError(f"Box scores are missing the {', '.join(missing)} columns")
+
+    lines = box_scores[[key for key in keys if key != 'Week'] + counting].assign(Week=box_score_weeks(box_scores, seasonStart))
+    totals = lines.groupby(list(keys), sort=False, observed=True)[counting].sum().reset_index()
+
+    for stat in stats:
+        if stat in PERCENTAGES:
+            made, attempts = (totals[column].to_numpy(dtype=np.float64) for column in PERCENTAGES[stat])
+            totals[stat] = np.divide(made, attempts, out=np.zeros(len(made)), where=attempts > 0)
+    return totals[list(keys) + stats]
+
+def load_box_score_team_weeks(source, stats, seasonStart=None):
+    return aggregate_box_scores(as_box_scores(source), stats, seasonStart=seasonStart)
@@ -0,0 +1,39 @@
+from lazyImport import lazy_import
+
+np = lazy_import('numpy')
+
+# Categories won by the team with the lower value
+LOWER_IS_BETTER = {'TO'}
+
+def category_directions(stats, lower_is_better=LOWER_IS_BETTER):
+    # +1 where the greater value wins the category, -1 where the lower one does
+    return np.array([-1.0 if stat in lower_is_better else 1.0 for stat in stats])
+
+def compare_categories(stats, directions):
+    # stats has shape (teams, ..., categories), e.g. (teams, weeks, categories), with NaN where a team has no line.
+    # Returns wins[i, j, ...]: number of categories team i beats team j in; ties and missing lines count for nobody.
+    oriented = np.asarray(stats, dtype=np.float64) * directions
+    wins = np.zeros((oriented.shape[0],) + oriented.shape[:-1], dtype=np.int16)
+
+    # One category at a time keeps the temporary at (teams x teams x ...) instead of also x categories
+    for category in range(oriented.shape[-1]):
+        values = oriented[..., category]
+        wins += values[:, None] > values[None, :]
+    return wins
+
+def compare_rows(rows, stats, directions):
+    # rows has shape (scenarios, ..., categories) with the same trailing shape as one team of stats.
+    # Returns (won, lost), each (scenarios, teams, ...): categories every row beats / loses to each team in,
+    # the same counts compare_categories gives for one team's row and column.
+    rows = np.asarray(rows, dtype=np.float64) * directions
+    oriented = np.asarray(stats, dtype=np.float64) * directions
+    shape = (rows.shape[0],) + oriented.shape[:-1]
+    won = np.zeros(shape, dtype=np.int16)
+    lost = np.zeros(shape, dtype=np.int16)
+
+    for category in range(oriented.shape[-1]):
+        row_values = rows[:, None, ..., category]
+        values = oriented[None, ..., category]
+        won += row_values > values
+        lost += values > row_values
+    return won, lost
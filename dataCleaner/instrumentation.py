@@ -0,0 +1,123 @@
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+
+from lazyImport import lazy_import
+
+# Only needed in profile/memory mode
+cProfile = lazy_import('cProfile')
+pstats = lazy_import('pstats')
+tracemalloc = lazy_import('tracemalloc')
+
+# Shared do-nothing context returned by disabled instrumentation, so a stage costs one method call
+_NO_STAGE = nullcontext()
+
+class _Stage:
+    __slots__ = ('_instrumentation', '_name', '_start')
+
+    def __init__(self, instrumentation, name):
+        self._instrumentation = instrumentation
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        timer = self._instrumentation.stages[self._name]
+        timer[0] += 1
+        timer[1] += time.perf_counter() - self._start
+
+class Instrumentation:
+    # Per stage timers and counters for one run, with optional cProfile and tracemalloc capture.
+    # A disabled instance keeps no state and its stage()/count() calls return immediately.
+    def __init__(self, enabled=True, profile=False, traceMemory=False):
+        self.enabled = enabled or profile or traceMemory
+        self.profile = profile
+        self.traceMemory = traceMemory
+        self.stages = defaultdict(lambda: [0, 0.0])
+        self.counters = defaultdict(int)
+        self._profiler = None
+        self._started = None
+
+    @classmethod
+    def from_environment(cls):
+        # DATACLEANER_INSTRUMENT is a comma separated list of: timers, profile, memory
+        modes = {mode.strip() for mode in os.environ.get('DATACLEANER_INSTRUMENT', '').split(',') if mode.strip()}
+        return cls(enabled=bool(modes), profile='profile' in modes, traceMemory='memory' in modes)
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NO_STAGE
+        return _Stage(self, name)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] += amount
+
+    def start(self):
+        if not self.enabled:
+            return self
+        self._started = time.perf_counter()
+        if self.traceMemory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def summary(self, topFunctions=20):
+        if not self.enabled:
+            return {}
+        result = {
+            'stages': {name: {'calls': calls, 'seconds': seconds} for name, (calls, seconds) in self.stages.items()},
+            'counters': dict(self.counters),
+        }
+        if self._started is not None:
+            result['seconds'] = time.perf_counter() - self._started
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            stats = pstats.Stats(self._profiler)
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:topFunctions]
+            result['profile'] = [
+                {'function': f'{filename}:{line}({name})', 'calls': calls, 'total': total, 'cumulative': cumulative}
+                for (filename, line, name), (_, calls, total, cumulative, _) in rows
+            ]
+            self._profiler.enable()
+
+        if self.traceMemory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics('lineno')[:topFunctions]
+            result['memory'] = {
+                'current_bytes': current,
+                'peak_bytes': peak,
+                'top': [{'location': str(stat.traceback), 'bytes': stat.size, 'blocks': stat.count} for stat in top],
+            }
+        return result
+
+    def stop(self):
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self.traceMemory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def write_summary(self, path=None, **extra):
+        # JSON summary to path, to DATACLEANER_SUMMARY or else to stderr; nothing when disabled
+        if not self.enabled:
+            return
+        summary = dict(self.summary(), **extra)
+        self.stop()
+        path = path or os.environ.get('DATACLEANER_SUMMARY')
+        if path:
+            with open(path, 'w') as stream:
+                json.dump(summary, stream, indent=2)
+        else:
+            json.dump(summary, sys.stderr, indent=2)
+            sys.stderr.write('\n')
+
+# Default for objects created without instrumentation
+DISABLED = Instrumentation(enabled=False)
@@ -0,0 +1,21 @@
+import importlib
+
+class LazyModule:
+    # Stand-in for a module that is only imported the first time one of its attributes is used.
+    # After that the module namespace is copied onto the instance, so attribute lookups cost the same
+    # as on the real module.
+    def __init__(self, name):
+        self.__dict__['_lazyName'] = name
+
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self._lazyName)
+        self.__dict__.update(module.__dict__)
+        # Attributes the module resolves through its own __getattr__ (e.g. numpy submodules)
+        return getattr(module, attribute)
+
+    def __repr__(self):
+        return f"<lazy module '{self._lazyName}'>"
+
+def lazy_import(name):
+    # np = lazy_import('numpy') keeps `import <this module>` from paying for numpy until it is needed
+    return LazyModule(name)
@@ -0,0 +1,84 @@
+import argparse
+import csv
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from lazyImport import lazy_import
+from leagueData import STATS, LeagueData
+from matchupData import league_key, matchup_columns
+
+pd = lazy_import('pandas')
+
+REPORT_COLUMNS = ['League', 'Week', 'Team', 'Wins Rank', 'Wins', 'Average Rank', 'Average']
+
+def is_matchup_csv(path):
+    # Only the header is read: a matchup export has every column the analysis needs
+    try:
+        with open(path, newline='', encoding='utf-8', errors='replace') as file:
+            header = next(csv.reader(file), [])
+    except OSError:
+        return False
+    return set(matchup_columns(STATS)) <= set(header)
+
+def find_matchup_csvs(source):
+    # A directory means every CSV inside it, anything else is used as a glob pattern.
+    # Other CSVs that match, e.g. an earlier ranking report, are left out.
+    if os.path.isdir(source):
+        source = os.path.join(source, '*.csv')
+    return sorted(path for path in glob.glob(source) if is_matchup_csv(path))
+
+def analyse_league(pathToCsv, cacheDir=None):
+    # Runs entirely inside one worker: ingestion, head-to-head results and the weekly rankings
+    league_data = LeagueData()
+    league_data.import_data(pathToCsv, cacheDir=cacheDir)
+    league = league_key(pathToCsv)
+
+    rows = []
+    for week in sorted(league_data.weeks):
+        wins_ranks = {team: (rank, wins) for rank, (team, wins) in enumerate(league_data.get_wins_ranking(week), start=1)}
+        for rank, (team, average) in enumerate(league_data.get_average_stats_ranking(week), start=1):
+            wins_rank, wins = wins_ranks[team]
+            rows.append([league, week, team, wins_rank, wins, rank, average])
+    return rows
+
+def _analyse_league_or_error(pathToCsv, cacheDir=None):
+    # (rows, None) or ([], 'ErrorType: message'), so one bad league does not abort the batch
+    try:
+        return analyse_league(pathToCsv, cacheDir), None
+    except Exception as error:
+        return [], f'{type(error).__name__}: {error}'
+
+def run_batch(source, output, workers=None, chunksize=1, cacheDir=None):
+    # Returns the report and [(path, error)] for the leagues that could not be analysed
+    paths = [path for path in find_matchup_csvs(source) if os.path.abspath(path) != os.path.abspath(output)]
+    if not paths:
+        raise FileNotFoundError(f"No matchup CSVs found in {source}")
+
+    rows = []
+    failures = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(partial(_analyse_league_or_error, cacheDir=cacheDir), paths, chunksize=chunksize)
+        for path, (league_rows, error) in zip(paths, results):
+            if error is not None:
+                failures.append((path, error))
+            rows.extend(league_rows)
+
+    report = pd.DataFrame(rows, columns=REPORT_COLUMNS)
+    report.to_csv(output, index=False)
+    return report, failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank every league in a directory or glob of Yahoo matchup CSVs")
+    parser.add_argument('source', help="directory with matchup CSVs or a glob pattern")
+    parser.add_argument('--output', default='league_rankings.csv', help="combined ranking report")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument('--chunksize', type=int, default=1, help="leagues handed to a worker at a time")
+    parser.add_argument('--cache-dir', default=None, help="snapshot directory for parsed leagues")
+    args = parser.parse_args()
+
+    report, failures = run_batch(args.source, args.output, args.workers, args.chunksize, args.cache_dir)
+    for path, error in failures:
+        print(f"Skipped {path}: {error}")
+    print(f"{report['League'].nunique()} leagues written to {args.output}")
@@ -1,94 +1,364 @@
-import pandas as pd
+import argparse
+from collections.abc import Mapping
 from itertools import combinations
 
+from boxScores import aggregate_box_scores, as_box_scores
+from headToHead import LOWER_IS_BETTER, category_directions, compare_categories, compare_rows
+from instrumentation import DISABLED, Instrumentation
+from lazyImport import lazy_import
+from matchupData import TEAM_SLOTS, as_matchups, league_key, matchup_columns, melt_matchups, read_matchups
+from queryCache import QueryCache
+from reportWriter import write_league_report
+from seasonMetrics import SeasonMetrics
+from snapshotCache import default_cache_dir, load_snapshot, save_snapshot
+from statsStore import TeamWeekStats
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
 STATS = ['FG%', 'FT%', '3PTM', 'PTS', 'REB', 'AST', 'ST', 'BLK', 'TO']
+STAT_INDEX = {stat: s for s, stat in enumerate(STATS)}
+SNAPSHOT_KIND = 'leagueData'
+# Columns identifying one matchup of the export
+SCHEDULE_COLUMNS = ['Week', 'Team 1 Name', 'Team 2 Name']
+
+class HeadToHeadView(Mapping):
+    # Lazy {(team1, team2): {week: (wonTeam1, wonTeam2)}} view over the category wins array.
+    # Pairs follow combinations(teamNames, 2) order and weeks where a team has no data map to {}.
+    def __init__(self, league_data):
+        self._league = league_data
+
+    def __getitem__(self, team_pair):
+        if team_pair not in self:
+            raise KeyError(team_pair)
+        league = self._league
+        i, j = (league.teamIndex[team] for team in team_pair)
+        return {week: league._week_result(i, j, week) for week in league.weeks}
+
+    def __contains__(self, team_pair):
+        index = self._league.teamIndex
+        try:
+            team1, team2 = team_pair
+            return index[team1] < index[team2]
+        except (KeyError, TypeError, ValueError):
+            return False
+
+    def __iter__(self):
+        return combinations(self._league.teamOrder, 2)
+
+    def __len__(self):
+        n = len(self._league.teamOrder)
+        return n * (n - 1) // 2
 
 class LeagueData:
-    def __init__(self, numberOfWeeks):
-        self.weeks = set(range(1, numberOfWeeks+1))
+    def __init__(self, numberOfWeeks=None, cacheSize=1024, instrumentation=None):
+        # When numberOfWeeks is not given the weeks are taken from the imported data
+        self.numberOfWeeks = numberOfWeeks
+        # Stage timers and counters, see instrumentation.py; disabled unless one is passed in
+        self.instrumentation = instrumentation or DISABLED
+        # Ranking and head-to-head answers, dropped for the weeks that change
+        self.queryCache = QueryCache(cacheSize, self.instrumentation)
+        self._resetData()
+        # Read-only {team: {week: {stat: value}}} views over the arrays
+        self.statsByTeamPerWeek = TeamWeekStats(self, STATS)
+        self.headToHeadResults = HeadToHeadView(self)
+
+    def _resetData(self):
+        self.queryCache.clear()
+        self.weeks = set(range(1, self.numberOfWeeks+1)) if self.numberOfWeeks else set()
+        # Prefix sums for the season metrics, built on first use after every change
+        self._seasonMetrics = None
         self.teamNames = set()
-        self.statsByTeamPerWeek = {}
         self.dataFrame = 0
-        self.headToHeadResults = {}
+
+        # Dense storage: statsArray[team, week, stat] with NaN where a team did not play,
+        # categoryWins[team1, team2, week] = categories team1 won against team2
+        self.teamOrder = []
+        self.teamIndex = {}
+        self.weekOrder = []
+        self.weekIndex = {}
+        self.statsArray = np.empty((0, 0, len(STATS)))
+        self.hasWeek = np.empty((0, 0), dtype=bool)
+        self.categoryWins = np.empty((0, 0, 0), dtype=np.int16)
+        self.teamWeekResults = {}
 
     def _list_of_oponents(self, team_name):
         return [opponent_team for opponent_team in self.teamNames if opponent_team != team_name]
 
-    def _importOneRealMatchup(self, row):
-        team1 = row['Team 1 Name']
-        team2 = row['Team 2 Name']
-        week = row['Week']
-
-        if week not in self.statsByTeamPerWeek[team1]:
-            self.statsByTeamPerWeek[team1][week] = {}
-
-        if week not in self.statsByTeamPerWeek[team2]:
-            self.statsByTeamPerWeek[team2][week] = {}
-
-        for stat in STATS:
-            self.statsByTeamPerWeek[team1][week][stat] = row[f'Team 1 {stat}']
-            self.statsByTeamPerWeek[team2][week][stat] = row[f'Team 2 {stat}']
+    def _buildStatsArray(self, team_weeks):
+        self.teamOrder = list(self.teamNames)
+        self.teamIndex = {team: i for i, team in enumerate(self.teamOrder)}
+        self.weekOrder = sorted(self.weeks | set(team_weeks['Week'].tolist()))
+        self.weekIndex = {week: w for w, week in enumerate(self.weekOrder)}
+
+        # Scatter every team-week line into its (team, week) cell in one assignment
+        team_codes = team_weeks['Team'].map(self.teamIndex).to_numpy()
+        week_codes = team_weeks['Week'].map(self.weekIndex).to_numpy()
+        self.statsArray = np.full((len(self.teamOrder), len(self.weekOrder), len(STATS)), np.nan)
+        self.statsArray[team_codes, week_codes] = team_weeks[STATS].to_numpy(dtype=np.float64)
+        self.hasWeek = ~np.isnan(self.statsArray).any(axis=-1)
+
+    def _compareAllTeams(self, stats):
+        n_teams, n_weeks = stats.shape[:2]
+        self.instrumentation.count('pairs_compared', n_teams * (n_teams - 1) // 2 * n_weeks)
+        with self.instrumentation.stage('head_to_head'):
+            return compare_categories(stats, category_directions(STATS, LOWER_IS_BETTER))
 
     def _importAllHeadToHeadResults(self):
-        for team_pair in combinations(self.teamNames, 2):
-            self.headToHeadResults[team_pair] = {week: {} for week in self.weeks}
-
-            for week in self.weeks:
-            
-                if week not in self.statsByTeamPerWeek[team_pair[0]] or week not in self.statsByTeamPerWeek[team_pair[1]]:
-                    continue
-
-                wonTeam1 = sum(1 for stat in STATS if stat == 'TO' and self.statsByTeamPerWeek[team_pair[0]][week][stat] < self.statsByTeamPerWeek[team_pair[1]][week][stat])
-                wonTeam2 = sum(1 for stat in STATS if stat == 'TO' and self.statsByTeamPerWeek[team_pair[0]][week][stat] > self.statsByTeamPerWeek[team_pair[1]][week][stat])
-                wonTeam1 += sum(1 for stat in STATS if stat != 'TO' and self.statsByTeamPerWeek[team_pair[0]][week][stat] > self.statsByTeamPerWeek[team_pair[1]][week][stat])
-                wonTeam2 += sum(1 for stat in STATS if stat != 'TO' and self.statsByTeamPerWeek[team_pair[0]][week][stat] < self.statsByTeamPerWeek[team_pair[1]][week][stat])
-                self.headToHeadResults[team_pair][week] = (wonTeam1, wonTeam2)
-    
-
-    def import_data(self, pathToCsv):
-        self.dataFrame = pd.read_csv(pathToCsv)
+        self.categoryWins = self._compareAllTeams(self.statsArray)
+        self._seasonMetrics = None
+        self.teamWeekResults = {}
+        self._buildTeamWeekIndex(self.weeks)
+
+    def _buildTeamWeekIndex(self, weeks):
+        # teamWeekResults[(team, week)] = {opponent: (won, lost)} for every opponent that also played that week
+        with self.instrumentation.stage('team_week_index'):
+            self._indexWeeks(weeks)
+
+    def _indexWeeks(self, weeks):
+        for week in weeks:
+            w = self.weekIndex.get(week)
+            if w is None:
+                continue
+            playing = np.flatnonzero(self.hasWeek[:, w])
+            # One (playing, playing) block per week as Python ints, not one array lookup per pair
+            block = self.categoryWins[np.ix_(playing, playing, [w])][:, :, 0]
+            won, lost = block.tolist(), block.T.tolist()
+            teams = [self.teamOrder[i] for i in playing.tolist()]
+            for a, team in enumerate(teams):
+                opponents = teams[:a] + teams[a + 1:]
+                results = zip(won[a][:a] + won[a][a + 1:], lost[a][:a] + lost[a][a + 1:])
+                self.teamWeekResults[(team, week)] = dict(zip(opponents, results))
+
+    def _week_result(self, i, j, week):
+        w = self.weekIndex.get(week)
+        if w is None or not (self.hasWeek[i, w] and self.hasWeek[j, w]):
+            return {}
+        return (int(self.categoryWins[i, j, w]), int(self.categoryWins[j, i, w]))
+
+    def import_data(self, pathToCsv, cacheDir=None, chunksize=None):
+        # With a cacheDir the parsed arrays and head-to-head results are kept on disk and memory-mapped
+        # on the next run, as long as neither the CSV nor STATS changed.
+        # With a chunksize the CSV is streamed that many rows at a time to bound memory on large archives.
+        # Whatever was loaded before is replaced, weeks included.
+        self._resetData()
+        if cacheDir is None:
+            self._importCsv(pathToCsv, chunksize)
+            return
+
+        with self.instrumentation.stage('snapshot_load'):
+            snapshot = load_snapshot(cacheDir, pathToCsv, STATS, SNAPSHOT_KIND)
+        if snapshot is not None:
+            self.instrumentation.count('snapshot_hits')
+            self._restoreSnapshot(*snapshot)
+        else:
+            self._importCsv(pathToCsv, chunksize)
+            with self.instrumentation.stage('snapshot_save'):
+                save_snapshot(cacheDir, pathToCsv, STATS, SNAPSHOT_KIND, *self._snapshot())
+
+    def _snapshot(self):
+        matchups = self.dataFrame
+        arrays = {
+            'statsArray': self.statsArray,
+            'hasWeek': self.hasWeek,
+            'categoryWins': self.categoryWins,
+            'matchupWeeks': matchups['Week'].to_numpy(dtype=np.int64),
+            'matchupTeams': np.column_stack([matchups[f'{slot} Name'].map(self.teamIndex).to_numpy(dtype=np.int64)
+                                             for slot in TEAM_SLOTS]),
+        }
+        data = {
+            'teamOrder': self.teamOrder,
+            'weekOrder': [int(week) for week in self.weekOrder],
+            'weeks': sorted(int(week) for week in self.weeks),
+        }
+        return arrays, data
+
+    def _restoreSnapshot(self, arrays, data):
+        self.teamOrder = data['teamOrder']
+        self.teamIndex = {team: i for i, team in enumerate(self.teamOrder)}
+        self.weekOrder = data['weekOrder']
+        self.weekIndex = {week: w for w, week in enumerate(self.weekOrder)}
+        self.teamNames = set(self.teamOrder)
+        if not self.weeks:
+            self.weeks = set(data['weeks'])
+
+        # Plain ndarray views of the memory maps, element access through np.memmap is many times slower
+        self.statsArray = np.asarray(arrays['statsArray'])
+        self.hasWeek = np.asarray(arrays['hasWeek'])
+        self.categoryWins = np.asarray(arrays['categoryWins'])
+        self._seasonMetrics = None
+
+        # Rebuild the matchup rows from the schedule and the stored lines
+        matchup_weeks = np.asarray(arrays['matchupWeeks'])
+        week_codes = np.searchsorted(np.asarray(self.weekOrder, dtype=np.int64), matchup_weeks)
+        teams = np.asarray(self.teamOrder, dtype=object)
+        columns = {'Week': matchup_weeks}
+        for slot, team_codes in zip(TEAM_SLOTS, np.asarray(arrays['matchupTeams']).T):
+            columns[f'{slot} Name'] = teams[team_codes]
+            for s, stat in enumerate(STATS):
+                columns[f'{slot} {stat}'] = self.statsArray[team_codes, week_codes, s]
+        self.dataFrame = pd.DataFrame(columns)[matchup_columns(STATS)]
+
+        self.teamWeekResults = {}
+        self._buildTeamWeekIndex(self.weeks)
+
+    def _importCsv(self, pathToCsv, chunksize=None):
+        if chunksize:
+            self._importCsvChunks(pathToCsv, chunksize)
+            return
+
+        with self.instrumentation.stage('read_csv'):
+            self.dataFrame = read_matchups(pathToCsv, STATS)
+        self.instrumentation.count('rows_ingested', len(self.dataFrame))
         self.teamNames = set(self.dataFrame['Team 1 Name'].unique()) | set(self.dataFrame['Team 2 Name'].unique())
-        self.statsByTeamPerWeek = {team: {} for team in self.teamNames}
 
-        for _, row in self.dataFrame.iterrows():
-            self._importOneRealMatchup(row)
+        with self.instrumentation.stage('stats_array'):
+            team_weeks = melt_matchups(self.dataFrame, STATS)
+            if not self.weeks:
+                self.weeks = set(team_weeks['Week'].tolist())
+            self._buildStatsArray(team_weeks)
         self._importAllHeadToHeadResults()
 
+    def _growArrays(self, team_names, weeks):
+        # Add rows for unseen teams and columns for unseen weeks, keeping weekOrder sorted
+        new_teams = [team for team in team_names if team not in self.teamIndex]
+        new_weeks = sorted(set(weeks) - set(self.weekIndex))
+        if not new_teams and not new_weeks:
+            return
+
+        old_week_codes = np.searchsorted(sorted(self.weekOrder + new_weeks), self.weekOrder)
+        self.teamOrder = self.teamOrder + new_teams
+        self.teamIndex = {team: i for i, team in enumerate(self.teamOrder)}
+        self.weekOrder = sorted(self.weekOrder + new_weeks)
+        self.weekIndex = {week: w for w, week in enumerate(self.weekOrder)}
+        self.teamNames |= set(new_teams)
+
+        n_old = self.statsArray.shape[0]
+        n_teams, n_weeks = len(self.teamOrder), len(self.weekOrder)
+        stats_array = np.full((n_teams, n_weeks, len(STATS)), np.nan)
+        stats_array[:n_old, old_week_codes] = self.statsArray
+        category_wins = np.zeros((n_teams, n_teams, n_weeks), dtype=self.categoryWins.dtype)
+        category_wins[:n_old, :n_old, old_week_codes] = self.categoryWins
+        self.statsArray = stats_array
+        self.categoryWins = category_wins
+        self.hasWeek = ~np.isnan(self.statsArray).any(axis=-1)
+
+    def append_week(self, rows):
+        # Ingest matchup rows (DataFrame or dicts in the matchup export layout) for new or updated weeks.
+        # Only the weeks present in rows are compared again; returns the sorted list of those weeks.
+        matchups = as_matchups(rows, STATS)
+        weeks = self._ingestMatchups(matchups)
+
+        if isinstance(self.dataFrame, pd.DataFrame):
+            matchups = pd.concat([self.dataFrame, matchups], ignore_index=True)
+        self.dataFrame = matchups.drop_duplicates(subset=SCHEDULE_COLUMNS, keep='last')
+        return weeks
+
+    def _ingestMatchups(self, matchups):
+        if matchups.empty:
+            return []
+        self.instrumentation.count('rows_ingested', len(matchups))
+        return self._ingestTeamWeeks(melt_matchups(matchups, STATS))
+
+    def _ingestTeamWeeks(self, team_weeks):
+        # Store team-week lines (Team, Week and STATS columns) and compare the teams again in their weeks only
+        if team_weeks.empty:
+            return []
+        with self.instrumentation.stage('stats_array'):
+            weeks = self._storeTeamWeeks(team_weeks)
+
+        # Compare all teams again only for the touched weeks and refresh their index entries
+        week_columns = [self.weekIndex[week] for week in weeks]
+        self.categoryWins[:, :, week_columns] = self._compareAllTeams(self.statsArray[:, week_columns])
+        self.weeks |= set(weeks)
+        self.queryCache.invalidate_weeks(weeks)
+        self._seasonMetrics = None
+        for team in self.teamOrder:
+            for week in weeks:
+                self.teamWeekResults.pop((team, week), None)
+        self._buildTeamWeekIndex(weeks)
+        return weeks
+
+    def _storeTeamWeeks(self, team_weeks):
+        # Write team-week lines into statsArray/hasWeek, growing them as needed
+        weeks = sorted(set(team_weeks['Week'].tolist()))
+
+        self._growArrays(pd.unique(team_weeks['Team']).tolist(), weeks)
+        team_codes = team_weeks['Team'].map(self.teamIndex).to_numpy()
+        week_codes = team_weeks['Week'].map(self.weekIndex).to_numpy()
+        self.statsArray[team_codes, week_codes] = team_weeks[STATS].to_numpy(dtype=np.float64)
+        self.hasWeek[team_codes, week_codes] = ~np.isnan(self.statsArray[team_codes, week_codes]).any(axis=-1)
+        return weeks
+
+    def _importCsvChunks(self, pathToCsv, chunksize):
+        # Streaming import: only chunksize rows are parsed at a time and folded into the arrays.
+        # dataFrame keeps just the schedule columns, the stats live in statsArray.
+        self._resetData()
+        schedule = []
+        chunks = iter(read_matchups(pathToCsv, STATS, chunksize=chunksize))
+        while True:
+            with self.instrumentation.stage('read_csv'):
+                matchups = next(chunks, None)
+            if matchups is None:
+                break
+            self._ingestMatchups(matchups)
+            schedule.append(matchups[SCHEDULE_COLUMNS])
+
+        if schedule:
+            self.dataFrame = pd.concat(schedule, ignore_index=True).drop_duplicates(keep='last')
+        else:
+            self.dataFrame = pd.DataFrame(columns=SCHEDULE_COLUMNS)
+
+    def import_box_scores(self, source, seasonStart=None):
+        # Replace the league with per-player daily box scores (DataFrame, dicts or CSV path, see boxScores.py)
+        # rolled up into team-week lines. Box scores carry no schedule, so dataFrame stays empty.
+        # Without a Week column the weeks are counted from the seasonStart date.
+        self._resetData()
+        self.dataFrame = pd.DataFrame(columns=SCHEDULE_COLUMNS)
+        return self.append_box_scores(source, seasonStart)
+
+    def append_box_scores(self, source, seasonStart=None):
+        # Ingest box scores of complete weeks: their team-week totals replace what is stored for those teams
+        with self.instrumentation.stage('read_csv'):
+            box_scores = as_box_scores(source)
+        self.instrumentation.count('rows_ingested', len(box_scores))
+        with self.instrumentation.stage('aggregate'):
+            team_weeks = aggregate_box_scores(box_scores, STATS, seasonStart=seasonStart)
+        return self._ingestTeamWeeks(team_weeks)
+
+    def import_delta(self, pathToCsv):
+        # Read a matchup export and ingest only the weeks that have not been loaded yet
+        matchups = read_matchups(pathToCsv, STATS)
+        return self.append_week(matchups[~matchups['Week'].isin(self.loaded_weeks())])
+
+    def loaded_weeks(self):
+        # Weeks with at least one team line
+        return {week for w, week in enumerate(self.weekOrder) if self.hasWeek[:, w].any()}
+
     def _get_average_result_for_team_in_week(self, team_name, week):
-        # Skip if team has no data for the week (not in playoff)
-        if week not in self.statsByTeamPerWeek[team_name]:
+        # Skip if team has no data for the week (not in playoff) or nobody else played that week
+        results = self.teamWeekResults.get((team_name, week))
+        if not results:
             return None
-        
-        # List to store results for the specified team in the specified week
-        results = []
 
-        # Iterate over headToHeadResults to find matchups involving the specified team in the specified week
-        for team_pair, week_results in self.headToHeadResults.items():
-            if week not in self.statsByTeamPerWeek[team_pair[0]] or week not in self.statsByTeamPerWeek[team_pair[1]]:
-                continue
-            if week in week_results and team_name in team_pair:
-                # Add result for the specified team in the specified week
-                results.append(week_results[week][team_pair.index(team_name)])
-
-        # Calculate the average result
-        if results:
-            average_result = sum(results) / len(results)
-            return average_result
-        else:
-            return None
+        return sum(won for won, _ in results.values()) / len(results)
         
     def get_average_stats_ranking(self, week=None):
+        return list(self.queryCache.get_or_compute('average_stats_ranking', week, None,
+                                                   lambda: self._compute_average_stats_ranking(week)))
+
+    def _compute_average_stats_ranking(self, week):
 
         # If week is provided, calculate average stats for that week only
         if week is not None:
             average_results = []
-            for team_name in self.teamNames:
+            for team_name in self.teamOrder:
                 average_result = self._get_average_result_for_team_in_week(team_name, week)
                 if average_result is not None:
                     average_results.append((team_name, average_result))
         else:
             average_results = []
-            for team_name in self.teamNames:
+            for team_name in self.teamOrder:
                 for week in self.weeks:
                     average_result = self._get_average_result_for_team_in_week(team_name, week)
                     if average_result is not None:
@@ -101,51 +371,49 @@ class LeagueData:
 
     def _get_wins_for_team_in_week(self, team_name, week):
         # Skip if team has no data for the week (not in playoff)
-        if week not in self.statsByTeamPerWeek[team_name]:
+        results = self.teamWeekResults.get((team_name, week))
+        if results is None:
             return None
-        
-        totalWins = 0
 
-        for team_pair, week_results in self.headToHeadResults.items():
-            if week not in self.statsByTeamPerWeek[team_pair[0]] or week not in self.statsByTeamPerWeek[team_pair[1]]:
-                continue
-            if week in week_results and team_name in team_pair:
-                if week_results[week][team_pair.index(team_name)] > week_results[week][1-team_pair.index(team_name)]:
-                    totalWins += 1
-
-        return totalWins
+        return sum(1 for won, lost in results.values() if won > lost)
         
     def get_wins_ranking(self, week):
-        # Dictionary to store average results for all teams in the specified week
+        return list(self.queryCache.get_or_compute('wins_ranking', week, None, lambda: self._compute_wins_ranking(week)))
+
+    def _compute_wins_ranking(self, week):
+        # Dictionary to store the number of opponents beaten by each team in the specified week
         wins_results = {}
 
-        # Iterate over all teams to calculate average results for each team in the specified week
-        for team_name in self.teamNames:
+        for team_name in self.teamOrder:
             wins_result = self._get_wins_for_team_in_week(team_name, week)
             if wins_result is not None:
                 wins_results[team_name] = wins_result
 
-        # Rank teams based on their average results
+        # Rank teams based on their wins
         ranked_teams = sorted(wins_results.items(), key=lambda x: x[1], reverse=True)
 
         return ranked_teams
 
-    def print_head_to_head_results(self, team1, team2):
-        
+    def get_head_to_head_summary(self, team1, team2):
+        # (team1, team2, ((week, team1_result, team2_result), ...), winsTeam1, winsTeam2, ties) with the pair
+        # in headToHeadResults order
         if (team1, team2) not in self.headToHeadResults:
-            aux = team1
-            team1 = team2
-            team2 = aux
-        print(f"\n{team1} VS {team2}")
-        print("-" * 20)
+            team1, team2 = team2, team1
+        return self.queryCache.get_or_compute('head_to_head', None, (team1, team2),
+                                              lambda: self._compute_head_to_head_summary(team1, team2))
+
+    def _compute_head_to_head_summary(self, team1, team2):
+        week_results = []
         winsTeam1 = 0
         winsTeam2 = 0
         ties = 0
 
-        for week in self.weeks:
-            team1_result = self.headToHeadResults[(team1, team2)][week][0]
-            team2_result = self.headToHeadResults[(team1, team2)][week][1]
-            print(f"Setmana {week}: {team1_result}-{team2_result}")
+        for week, result in self.headToHeadResults[(team1, team2)].items():
+            # Weeks where either team has no line are not a matchup
+            if not result:
+                continue
+            team1_result, team2_result = result
+            week_results.append((week, team1_result, team2_result))
 
             if team1_result > team2_result:
                 winsTeam1 += 1
@@ -153,56 +421,172 @@ class LeagueData:
                 winsTeam2 += 1
             else:
                 ties += 1
+        return (team1, team2, tuple(week_results), winsTeam1, winsTeam2, ties)
+
+    def season_metrics(self):
+        if self._seasonMetrics is None:
+            with self.instrumentation.stage('season_metrics'):
+                self._seasonMetrics = SeasonMetrics(self.categoryWins, self.hasWeek, self.statsArray,
+                                                    category_directions(STATS, LOWER_IS_BETTER))
+        return self._seasonMetrics
+
+    def _weekWindow(self, fromWeek=None, throughWeek=None):
+        # weekOrder positions start:end of the weeks fromWeek..throughWeek, both inclusive and optional
+        start = 0 if fromWeek is None else int(np.searchsorted(self.weekOrder, fromWeek, side='left'))
+        end = len(self.weekOrder) if throughWeek is None else int(np.searchsorted(self.weekOrder, throughWeek, side='right'))
+        return start, max(start, end)
+
+    def _rank(self, values):
+        # (team, value) for the teams with a value, best first and ties in teamOrder
+        ranked = [(team, float(value)) for team, value in zip(self.teamOrder, values.tolist()) if value == value]
+        return sorted(ranked, key=lambda x: x[1], reverse=True)
+
+    def get_all_play_ranking(self, fromWeek=None, throughWeek=None):
+        # Share of the weekly all-play matchups won over the weeks, ties counting half
+        win_pct, _ = self.season_metrics().all_play(*self._weekWindow(fromWeek, throughWeek))
+        return self._rank(win_pct)
+
+    def get_form_ranking(self, lastWeeks=3, throughWeek=None):
+        # All-play win share over the last lastWeeks weeks up to throughWeek (default: the last loaded week)
+        if throughWeek is None:
+            throughWeek = max(self.loaded_weeks(), default=None)
+        _, end = self._weekWindow(throughWeek=throughWeek)
+        win_pct, _ = self.season_metrics().all_play(max(end - lastWeeks, 0), end)
+        return self._rank(win_pct)
+
+    def get_season_average_ranking(self, fromWeek=None, throughWeek=None):
+        # Mean of the weekly get_average_stats_ranking values over the weeks each team played
+        average, _ = self.season_metrics().average(*self._weekWindow(fromWeek, throughWeek))
+        return self._rank(average)
+
+    def get_category_percentiles(self, fromWeek=None, throughWeek=None):
+        # {team: {stat: percentile}} of each team's per-week category averages against the other teams
+        percentiles = self.season_metrics().category_percentiles(*self._weekWindow(fromWeek, throughWeek))
+        return {team: dict(zip(STATS, row)) for team, row in zip(self.teamOrder, percentiles.tolist())
+                if row[0] == row[0]}
+
+    def _deltaArray(self, deltas):
+        # {stat: delta} for every week or {week: {stat: delta}} as a (weeks, stats) array in weekOrder
+        delta = np.zeros((len(self.weekOrder), len(STATS)))
+        for key, value in deltas.items():
+            if isinstance(value, Mapping):
+                if key not in self.weekIndex:
+                    raise ValueError(f"Unknown week {key}")
+                for stat, amount in value.items():
+                    delta[self.weekIndex[key], self._statColumn(stat)] += amount
+            else:
+                delta[:, self._statColumn(key)] += value
+        return delta
+
+    def _statColumn(self, stat):
+        if stat not in STAT_INDEX:
+            raise ValueError(f"Unknown stat {stat}")
+        return STAT_INDEX[stat]
+
+    def what_if_category_wins(self, team, scenarios):
+        # team's row and column of categoryWins with the stat deltas of every scenario applied:
+        # (won, lost), each (scenarios, teams, weeks). Only this team is compared again, nothing stored changes.
+        i = self.teamIndex[team]
+        rows = self.statsArray[i] + np.stack([self._deltaArray(deltas) for deltas in scenarios])
+        won, lost = compare_rows(rows, self.statsArray, category_directions(STATS, LOWER_IS_BETTER))
+        won[:, i] = 0
+        lost[:, i] = 0
+        return won, lost
+
+    def what_if_batch(self, team, scenarios, batchSize=256):
+        # (average, wins), each (scenarios, weeks) in weekOrder: the average stats and wins ranking values of team
+        # under every scenario, NaN average and 0 wins where the team or all of its opponents have no line.
+        # Scenarios are scored batchSize at a time to bound the (scenarios, teams, weeks, stats) temporaries.
+        i = self.teamIndex[team]
+        opponents = self.hasWeek & self.hasWeek[i]
+        opponents[i] = False
+        n_opponents = opponents.sum(axis=0)
+
+        scenarios = list(scenarios)
+        averages = [np.empty((0, len(self.weekOrder)))]
+        wins = [np.empty((0, len(self.weekOrder)), dtype=np.int64)]
+        for start in range(0, len(scenarios), batchSize):
+            won, lost = self.what_if_category_wins(team, scenarios[start:start + batchSize])
+            total = np.where(opponents, won, 0).sum(axis=1)
+            averages.append(np.where(n_opponents > 0, total / np.maximum(n_opponents, 1), np.nan))
+            wins.append(((won > lost) & opponents).sum(axis=1))
+        return np.concatenate(averages), np.concatenate(wins)
+
+    def what_if(self, team, deltas):
+        # {week: {'average': (before, after), 'wins': (before, after)}} for the weeks team played, where average
+        # and wins are the values get_average_stats_ranking and get_wins_ranking would report
+        (averages,), (wins,) = self.what_if_batch(team, [deltas])
+        results = {}
+        for w, week in enumerate(self.weekOrder):
+            before = self._get_average_result_for_team_in_week(team, week)
+            if before is None:
+                continue
+            results[week] = {
+                'average': (before, float(averages[w])),
+                'wins': (self._get_wins_for_team_in_week(team, week), int(wins[w])),
+            }
+        return results
+
+    def print_head_to_head_results(self, team1, team2):
+        team1, team2, week_results, winsTeam1, winsTeam2, ties = self.get_head_to_head_summary(team1, team2)
+        print(f"\n{team1} VS {team2}")
+        print("-" * 20)
+        for week, team1_result, team2_result in week_results:
+            print(f"Setmana {week}: {team1_result}-{team2_result}")
         print(f"Total:  {team1} {winsTeam1}  {team2} {winsTeam2}  {ties} empats\n")
 
     def get_data(self, key):
-        return self.data.get(key, "No data found for this key")
-
-# Initialize a LeagueData instance
-league_data = LeagueData(23)
-# Add sample data
-csv_path = "Yahoo-428.l.17058-Matchup.csv"
-league_data.import_data(csv_path)
-week = 23
-ranked_teams_by_average_stats = league_data.get_average_stats_ranking(week)
-
-print("Ranking by average stats on week " + str(week) + ":")
-for rank, (team_name, result) in enumerate(ranked_teams_by_average_stats, start=1):
-    print(f"{rank}. {team_name}: {result:.2f}")
-
-ranked_teams_by_wins = league_data.get_wins_ranking(week)
-
-print("Ranking by wins on week " + str(week) + ":")
-for rank, (team_name, result) in enumerate(ranked_teams_by_wins, start=1):
-    print(f"{rank}. {team_name}: {result}")
-
-league_data.print_head_to_head_results('PistosCF', 'Danilovic a fool')
-
-#ranking de totes les setmanes
-#ranked_teams_by_average_stats_all_weeks = league_data.get_average_stats_ranking()
-#print("Ranking by average stats:")
-#for rank, (team_name, week, result) in enumerate(ranked_teams_by_average_stats_all_weeks, start=1):
-#    print(f"{rank}. {team_name}, setmana {week}: {result:.2f}")
-
-#ranking mig tota la temporada
-ranked_teams_by_average_stats_all_weeks = league_data.get_average_stats_ranking()
-print("Ranking all season by avg stats:")
-team_results = {}
-# Iterate over the ranked teams by average stats for all weeks
-for team_name, week, result in ranked_teams_by_average_stats_all_weeks:
-    if team_name not in team_results:
-        # If the team is not yet in the dictionary, initialize its entry
-        team_results[team_name] = {'total_avg': 0, 'weeks': {}}
-    # Update the total average result for the team
-    team_results[team_name]['total_avg'] += result
-    # Update the average result for the current week
-    team_results[team_name]['weeks'][week] = result
-
-sorted_team_results = sorted(team_results.items(), key=lambda x: x[1]['total_avg'], reverse=True)
-# Iterate over the aggregated results and print the ranking
-for rank, (team_name, team_data) in enumerate(team_results.items(), start=1):
-    total_avg = team_data['total_avg'] / len(team_data['weeks'])
-    print(f"{rank}. {team_name}: Total Average: {total_avg:.2f}")
+        # {week: {stat: value}} of the team named key
+        if key not in self.statsByTeamPerWeek:
+            return "No data found for this key"
+        return {week: dict(stats) for week, stats in self.statsByTeamPerWeek[key].items()}
+
+DEFAULT_CSV = "Yahoo-428.l.17058-Matchup.csv"
+
+def print_week_rankings(league_data, week):
+    ranked_teams_by_average_stats = league_data.get_average_stats_ranking(week)
+
+    print("Ranking by average stats on week " + str(week) + ":")
+    for rank, (team_name, result) in enumerate(ranked_teams_by_average_stats, start=1):
+        print(f"{rank}. {team_name}: {result:.2f}")
+
+    ranked_teams_by_wins = league_data.get_wins_ranking(week)
+
+    print("Ranking by wins on week " + str(week) + ":")
+    for rank, (team_name, result) in enumerate(ranked_teams_by_wins, start=1):
+        print(f"{rank}. {team_name}: {result}")
+
+def print_report(league_data, week, team1, team2):
+    print_week_rankings(league_data, week)
+    league_data.print_head_to_head_results(team1, team2)
+
+    #ranking de totes les setmanes
+    #ranked_teams_by_average_stats_all_weeks = league_data.get_average_stats_ranking()
+    #print("Ranking by average stats:")
+    #for rank, (team_name, week, result) in enumerate(ranked_teams_by_average_stats_all_weeks, start=1):
+    #    print(f"{rank}. {team_name}, setmana {week}: {result:.2f}")
+
+    #ranking mig tota la temporada
+    print("Ranking all season by avg stats:")
+    for rank, (team_name, total_avg) in enumerate(league_data.get_season_average_ranking(), start=1):
+        print(f"{rank}. {team_name}: Total Average: {total_avg:.2f}")
+
+def run_report(csv_path=DEFAULT_CSV, numberOfWeeks=23, week=23, team1='PistosCF', team2='Danilovic a fool',
+               useCache=True, reportDir=None, reportFormat='parquet'):
+    # With a reportDir the rankings and head-to-head tables are also written there, see reportWriter.py
+    # DATACLEANER_INSTRUMENT=timers[,profile][,memory] prints a JSON run summary at the end
+    instrumentation = Instrumentation.from_environment().start()
+    league_data = LeagueData(numberOfWeeks, instrumentation=instrumentation)
+    league_data.import_data(csv_path, cacheDir=default_cache_dir(csv_path) if useCache else None)
+    print_report(league_data, week, team1, team2)
+    if reportDir:
+        with instrumentation.stage('write_report'):
+            write_league_report(league_data, reportDir, league_key(csv_path), reportFormat)
+
+    instrumentation.count('teams', len(league_data.teamOrder))
+    instrumentation.count('weeks', len(league_data.weekOrder))
+    instrumentation.write_summary(script='leagueData', csv=csv_path)
+    return league_data
 
 def print_main_menu():
     print("\nMain Menu:")
@@ -213,41 +597,68 @@ def print_main_menu():
 
 def print_retrieve_menu():
     print("\nRetrieve Menu:")
-    print("1. Retrieve all data")
-    print("2. Retrieve specific data")
-    print("3. Back to main menu")
+    print("1. Rankings for a week")
+    print("2. Stats of a team")
+    print("3. Head-to-head of two teams")
+    print("4. Back to main menu")
 
 
 def retrieve_specific_data(data_obj):
-    key = input("Enter key to retrieve data: ")
+    key = input("Enter team name to retrieve data: ")
     print(data_obj.get_data(key))
 
 
-def main():
-    data_obj = DataObject()
+def retrieve_week_rankings(data_obj):
+    week = input("Enter week (empty for the whole season): ").strip()
+    if not week:
+        for rank, (team_name, week, result) in enumerate(data_obj.get_average_stats_ranking(), start=1):
+            print(f"{rank}. {team_name}, setmana {week}: {result:.2f}")
+    elif week.isdigit():
+        print_week_rankings(data_obj, int(week))
+    else:
+        print("Invalid week.")
+
+
+def retrieve_head_to_head(data_obj):
+    team1 = input("Enter first team: ")
+    team2 = input("Enter second team: ")
+    if team1 == team2 or not {team1, team2} <= data_obj.teamNames:
+        print("Invalid teams. Known teams: " + ", ".join(data_obj.teamOrder))
+        return
+    data_obj.print_head_to_head_results(team1, team2)
+
+
+def main(data_obj=None):
+    # Interactive queries against one LeagueData that stays loaded between them
+    data_obj = data_obj if data_obj is not None else LeagueData()
 
     while True:
         print_main_menu()
         choice = input("Enter your choice: ")
 
         if choice == "1":
-            key = input("Enter key: ")
-            value = input("Enter value: ")
-            data_obj.add_data(key, value)
-            print("Data added successfully!")
+            path = input("Enter path to matchup CSV: ")
+            # A new LeagueData, so a failed import keeps the league loaded before
+            league_data = LeagueData()
+            try:
+                league_data.import_data(path, cacheDir=default_cache_dir(path))
+            except (OSError, ValueError) as error:
+                print(f"Could not import {path}: {error}")
+                continue
+            data_obj = league_data
+            print("Data imported successfully!")
         elif choice == "2":
             while True:
                 print_retrieve_menu()
                 retrieve_choice = input("Enter your choice: ")
                 if retrieve_choice == "1":
-                    # Retrieve all data
-                    print("All data:")
-                    for key, value in data_obj.data.items():
-                        print(f"{key}: {value}")
+                    retrieve_week_rankings(data_obj)
                 elif retrieve_choice == "2":
                     # Retrieve specific data
                     retrieve_specific_data(data_obj)
                 elif retrieve_choice == "3":
+                    retrieve_head_to_head(data_obj)
+                elif retrieve_choice == "4":
                     break  # Go back to main menu
                 else:
                     print("Invalid choice. Please choose a valid option.")
@@ -259,4 +670,19 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Week and season rankings plus a head-to-head for one Yahoo matchup CSV")
+    parser.add_argument('csv', nargs='?', default=DEFAULT_CSV, help="matchup export")
+    parser.add_argument('--weeks', type=int, default=23, help="number of weeks in the season")
+    parser.add_argument('--week', type=int, default=23, help="week of the weekly rankings")
+    parser.add_argument('--head-to-head', nargs=2, metavar='TEAM', default=['PistosCF', 'Danilovic a fool'],
+                        help="teams of the head-to-head summary")
+    parser.add_argument('--no-cache', action='store_true', help="always parse the CSV instead of using its snapshot")
+    parser.add_argument('--menu', action='store_true', help="start the interactive menu after the report")
+    parser.add_argument('--report-dir', default=None, help="also write the report tables under this directory")
+    parser.add_argument('--report-format', choices=['parquet', 'arrow'], default='parquet')
+    args = parser.parse_args()
+
+    league_data = run_report(args.csv, args.weeks, args.week, *args.head_to_head, useCache=not args.no_cache,
+                             reportDir=args.report_dir, reportFormat=args.report_format)
+    if args.menu:
+        main(league_data)
\ No newline at end of file
@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from leagueBatch import find_matchup_csvs
+from leagueData import LeagueData
+from matchupData import league_key
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class WarmLeague:
+    # One LeagueData kept in memory for a matchup CSV. The file is checked at most every checkInterval seconds
+    # and a changed CSV is imported into a new LeagueData that replaces the old one once it is complete.
+    def __init__(self, pathToCsv, cacheDir=None, checkInterval=1.0):
+        self.path = pathToCsv
+        self.key = league_key(pathToCsv)
+        self.cacheDir = cacheDir
+        self.checkInterval = checkInterval
+        self.reloads = 0
+        self.lastError = None
+        # Queries and reloads of one league run one at a time, the query cache is not thread safe
+        self.lock = threading.Lock()
+        self._signature = None
+        self._nextCheck = 0.0
+        self.leagueData = None
+        self._reload(self._fileSignature())
+
+    def _fileSignature(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _reload(self, signature):
+        league_data = LeagueData()
+        league_data.import_data(self.path, cacheDir=self.cacheDir)
+        self.leagueData = league_data
+        self._signature = signature
+        self.reloads += 1
+        self.lastError = None
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now < self._nextCheck:
+            return
+        self._nextCheck = now + self.checkInterval
+        try:
+            signature = self._fileSignature()
+            if signature != self._signature:
+                self._reload(signature)
+        except Exception as error:
+            # Keep answering from the last good import, e.g. while the CSV is being rewritten
+            self.lastError = f'{type(error).__name__}: {error}'
+
+    def query(self, function):
+        with self.lock:
+            self._refresh()
+            return function(self.leagueData)
+
+    def describe(self):
+        return self.query(lambda league_data: {
+            'league': self.key,
+            'path': self.path,
+            'teams': list(league_data.teamOrder),
+            'weeks': sorted(league_data.loaded_weeks()),
+            'reloads': self.reloads,
+            'lastError': self.lastError,
+        })
+
+class LeagueService:
+    # Routes JSON queries to warm leagues:
+    #   /leagues
+    #   /leagues/<league>
+    #   /leagues/<league>/rankings/wins?week=N
+    #   /leagues/<league>/rankings/average[?week=N]
+    #   /leagues/<league>/head-to-head?team1=A&team2=B
+    #   /leagues/<league>/weeks/<N>
+    def __init__(self, paths, cacheDir=None, checkInterval=1.0):
+        # A CSV that cannot be imported is left out and reported in failures as (path, error);
+        # two CSVs of the same league are a configuration error, queries could not tell them apart
+        self.leagues = {}
+        self.failures = []
+        for path in paths:
+            key = league_key(path)
+            if key in self.leagues:
+                raise ValueError(f"{path} and {self.leagues[key].path} are both league {key}")
+            try:
+                self.leagues[key] = WarmLeague(path, cacheDir, checkInterval)
+            except Exception as error:
+                self.failures.append((path, f'{type(error).__name__}: {error}'))
+
+    def handle(self, url):
+        # Returns the JSON payload for a GET on url, raises ServiceError for bad requests
+        parsed = urlparse(url)
+        parts = [unquote(part) for part in parsed.path.split('/') if part]
+        params = {name: values[-1] for name, values in parse_qs(parsed.query).items()}
+
+        if parts == ['leagues']:
+            return {'leagues': sorted(self.leagues)}
+        if len(parts) < 2 or parts[0] != 'leagues':
+            raise ServiceError(404, f"Unknown path {parsed.path}")
+        league = self.leagues.get(parts[1])
+        if league is None:
+            raise ServiceError(404, f"Unknown league {parts[1]}")
+
+        route = parts[2:]
+        if not route:
+            return league.describe()
+        if route == ['rankings', 'wins']:
+            week = _int_param(params, 'week')
+            ranking = league.query(lambda league_data: league_data.get_wins_ranking(week))
+            return {'week': week, 'ranking': [{'team': team, 'wins': wins} for team, wins in ranking]}
+        if route == ['rankings', 'average']:
+            week = _int_param(params, 'week', required=False)
+            ranking = league.query(lambda league_data: league_data.get_average_stats_ranking(week))
+            if week is None:
+                return {'week': None, 'ranking': [{'team': team, 'week': team_week, 'average': average}
+                                                  for team, team_week, average in ranking]}
+            return {'week': week, 'ranking': [{'team': team, 'average': average} for team, average in ranking]}
+        if route == ['head-to-head']:
+            team1, team2 = _team_param(params, 'team1'), _team_param(params, 'team2')
+            return league.query(lambda league_data: _head_to_head(league_data, team1, team2))
+        if len(route) == 2 and route[0] == 'weeks':
+            week = _parse_int('week', route[1])
+            return league.query(lambda league_data: _week(league_data, week))
+        raise ServiceError(404, f"Unknown path {parsed.path}")
+
+def _parse_int(name, value):
+    try:
+        return int(value)
+    except ValueError:
+        raise ServiceError(400, f"{name} must be an integer, got {value!r}")
+
+def _int_param(params, name, required=True):
+    if name not in params:
+        if required:
+            raise ServiceError(400, f"Missing {name} parameter")
+        return None
+    return _parse_int(name, params[name])
+
+def _team_param(params, name):
+    if not params.get(name):
+        raise ServiceError(400, f"Missing {name} parameter")
+    return params[name]
+
+def _head_to_head(league_data, team1, team2):
+    for team in (team1, team2):
+        if team not in league_data.teamIndex:
+            raise ServiceError(404, f"Unknown team {team}")
+    if team1 == team2:
+        raise ServiceError(400, "team1 and team2 must differ")
+    team1, team2, week_results, winsTeam1, winsTeam2, ties = league_data.get_head_to_head_summary(team1, team2)
+    return {
+        'team1': team1,
+        'team2': team2,
+        'weeks': [{'week': week, 'team1': result1, 'team2': result2} for week, result1, result2 in week_results],
+        'winsTeam1': winsTeam1,
+        'winsTeam2': winsTeam2,
+        'ties': ties,
+    }
+
+def _week(league_data, week):
+    if week not in league_data.loaded_weeks():
+        raise ServiceError(404, f"No data for week {week}")
+    stats = {}
+    results = {}
+    for team in league_data.teamOrder:
+        team_results = league_data.teamWeekResults.get((team, week))
+        if team_results is None:
+            continue
+        stats[team] = dict(league_data.statsByTeamPerWeek[team][week])
+        results[team] = {opponent: {'won': won, 'lost': lost} for opponent, (won, lost) in team_results.items()}
+    return {'week': week, 'stats': stats, 'results': results}
+
+def _json_default(value):
+    # numpy scalars
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+class LeagueRequestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        try:
+            status, payload = 200, self.service.handle(self.path)
+        except ServiceError as error:
+            status, payload = error.status, {'error': str(error)}
+        except Exception as error:
+            status, payload = 500, {'error': f'{type(error).__name__}: {error}'}
+        body = json.dumps(payload, default=_json_default).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def make_server(service, host='127.0.0.1', port=8023):
+    # Port 0 picks a free port, see server.server_address
+    handler = type('BoundLeagueRequestHandler', (LeagueRequestHandler,), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve rankings and head-to-head queries for warm Yahoo matchup CSVs")
+    parser.add_argument('source', help="matchup CSV, directory with matchup CSVs or a glob pattern")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8023)
+    parser.add_argument('--cache-dir', default=None, help="snapshot directory for parsed leagues")
+    parser.add_argument('--check-interval', type=float, default=1.0, help="seconds between checks for a changed CSV")
+    args = parser.parse_args()
+
+    paths = [args.source] if os.path.isfile(args.source) else find_matchup_csvs(args.source)
+    if not paths:
+        sys.exit(f"No matchup CSVs found in {args.source}")
+    service = LeagueService(paths, args.cache_dir, args.check_interval)
+    for path, error in service.failures:
+        print(f"Skipped {path}: {error}")
+    if not service.leagues:
+        sys.exit(f"No matchup CSVs in {args.source} could be imported")
+    server = make_server(service, args.host, args.port)
+    print(f"Serving {', '.join(sorted(service.leagues))} on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
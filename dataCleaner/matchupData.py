@@ -0,0 +1,60 @@
+import os
+import re
+
+from lazyImport import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Column prefixes of the two teams in every row of a Yahoo matchup export
+TEAM_SLOTS = ['Team 1', 'Team 2']
+
+def league_key(pathToCsv):
+    # 'Yahoo-428.l.17058-Matchup.csv' -> '428.l.17058', anything else keeps its file name
+    name = os.path.splitext(os.path.basename(pathToCsv))[0]
+    match = re.search(r'\d+\.l\.\d+', name)
+    return match.group(0) if match else name
+
+def matchup_columns(stats):
+    return ['Week'] + [f'{slot} {field}' for slot in TEAM_SLOTS for field in ['Name'] + list(stats)]
+
+def matchup_dtypes(stats):
+    dtypes = {'Week': np.int64}
+    for slot in TEAM_SLOTS:
+        dtypes[f'{slot} Name'] = str
+        for stat in stats:
+            dtypes[f'{slot} {stat}'] = np.float64
+    return dtypes
+
+def read_matchups(pathToCsv, stats, **read_csv_kwargs):
+    # Only read the columns needed for the analysis, with fixed dtypes so pandas skips type inference
+    return pd.read_csv(pathToCsv, usecols=matchup_columns(stats), dtype=matchup_dtypes(stats), **read_csv_kwargs)
+
+def as_matchups(rows, stats):
+    # Accept a DataFrame or an iterable of dicts in the matchup export layout
+    matchups = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+    return matchups[matchup_columns(stats)].astype(matchup_dtypes(stats))
+
+def melt_matchups(matchups, stats):
+    # Stack the Team 1 and Team 2 column blocks into one row per (team, week) with a column per stat
+    stats = list(stats)
+    blocks = []
+    for slot in TEAM_SLOTS:
+        block = matchups[['Week', f'{slot} Name'] + [f'{slot} {stat}' for stat in stats]]
+        block.columns = ['Week', 'Team'] + stats
+        blocks.append(block)
+
+    team_weeks = pd.concat(blocks, ignore_index=True)
+    # A team listed twice in the same week keeps its last line, as the row by row import did
+    return team_weeks.drop_duplicates(subset=['Team', 'Week'], keep='last')
+
+def load_team_weeks(pathToCsv, stats, **read_csv_kwargs):
+    return melt_matchups(read_matchups(pathToCsv, stats, **read_csv_kwargs), stats)
+
+def team_weeks_to_dict(team_weeks, stats):
+    # {team: {week: {stat: value}}} built from whole columns instead of cell by cell
+    stats = list(stats)
+    result = {}
+    for team, week, values in zip(team_weeks['Team'].tolist(), team_weeks['Week'].tolist(), team_weeks[stats].to_numpy().tolist()):
+        result.setdefault(team, {})[week] = dict(zip(stats, values))
+    return result
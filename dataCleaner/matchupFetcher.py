@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from matchupData import TEAM_SLOTS
+
+# Yahoo Fantasy scoreboard of one league week, league is a key like '428.l.17058'
+SCOREBOARD_URL = 'https://fantasysports.yahooapis.com/fantasy/v2/league/{league}/scoreboard;week={week}?format=json'
+
+# Yahoo stat ids of the matchup categories
+STAT_IDS = {'5': 'FG%', '8': 'FT%', '10': '3PTM', '12': 'PTS', '15': 'REB', '16': 'AST', '17': 'ST', '18': 'BLK', '19': 'TO'}
+
+def _numbered(collection):
+    # Yahoo JSON lists come as {"0": item, "1": item, ..., "count": n}
+    return [collection[key] for key in sorted((key for key in collection if key.isdigit()), key=int)]
+
+def _merge(items):
+    merged = {}
+    for item in items:
+        if isinstance(item, dict):
+            merged.update(item)
+    return merged
+
+def parse_scoreboard(payload):
+    # Scoreboard JSON -> matchup rows with the columns of the Yahoo matchup CSV export
+    league = json.loads(payload)['fantasy_content']['league']
+    scoreboard = _merge(league)['scoreboard']
+    rows = []
+    for matchups in _numbered(scoreboard):
+        for entry in _numbered(matchups['matchups']):
+            matchup = entry['matchup']
+            row = {'Week': int(matchup['week'])}
+            for slot, team_entry in zip(TEAM_SLOTS, _numbered(matchup['0']['teams'])):
+                info, details = team_entry['team'][0], _merge(team_entry['team'][1:])
+                info = _merge(info)
+                row[f'{slot} ID'] = info['team_key']
+                row[f'{slot} Name'] = info['name']
+                row[f'{slot} Points'] = float(details.get('team_points', {}).get('total', 0) or 0)
+                for stat in details['team_stats']['stats']:
+                    name = STAT_IDS.get(stat['stat']['stat_id'])
+                    if name is not None:
+                        value = stat['stat']['value']
+                        row[f'{slot} {name}'] = float(value) if value not in ('', '-', None) else float('nan')
+            rows.append(row)
+    return rows
+
+def cookies_from_file(cookieFile):
+    # Cookies persisted by the login session pool, a JSON list of WebDriver cookie dicts
+    with open(cookieFile, 'r') as stream:
+        return json.load(stream)
+
+class MatchupFetcher:
+    # Downloads league weeks over one pooled HTTP session, several weeks at a time.
+    # Responses are cached on disk with their ETag / Last-Modified so unchanged weeks come back as 304.
+    def __init__(self, league, cookies=None, cacheDir=None, urlTemplate=SCOREBOARD_URL, parser=parse_scoreboard,
+                 workers=4, timeout=30):
+        self.league = league
+        self.cacheDir = cacheDir
+        self.urlTemplate = urlTemplate
+        self.parser = parser
+        self.workers = workers
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._setCookies(cookies or [])
+
+    def _setCookies(self, cookies):
+        if isinstance(cookies, dict):
+            cookies = [{'name': name, 'value': value} for name, value in cookies.items()]
+        for cookie in cookies:
+            self.session.cookies.set(cookie['name'], cookie['value'],
+                                     domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _cachePaths(self, url):
+        name = hashlib.sha256(url.encode()).hexdigest()[:24]
+        directory = os.path.join(self.cacheDir, self.league)
+        return os.path.join(directory, f'{name}.body'), os.path.join(directory, f'{name}.json')
+
+    def _readCache(self, url):
+        if self.cacheDir is None:
+            return None, {}
+        body_path, meta_path = self._cachePaths(url)
+        try:
+            with open(meta_path, 'r') as stream:
+                meta = json.load(stream)
+            with open(body_path, 'rb') as stream:
+                return stream.read(), meta
+        except (OSError, ValueError):
+            return None, {}
+
+    def _writeCache(self, url, body, headers):
+        if self.cacheDir is None:
+            return
+        body_path, meta_path = self._cachePaths(url)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        meta = {'url': url, 'etag': headers.get('ETag'), 'lastModified': headers.get('Last-Modified')}
+        for path, mode, content in ((body_path, 'wb', body), (meta_path, 'w', json.dumps(meta))):
+            with open(f'{path}.tmp', mode) as stream:
+                stream.write(content)
+            os.replace(f'{path}.tmp', path)
+
+    def fetch_week(self, week):
+        # Returns (body, changed); changed is False when the server confirmed the cached copy
+        url = self.urlTemplate.format(league=self.league, week=week)
+        cached_body, meta = self._readCache(url)
+
+        headers = {}
+        if cached_body is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('lastModified'):
+                headers['If-Modified-Since'] = meta['lastModified']
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            if cached_body is not None:
+                return cached_body, False
+            # Not modified, but there is no copy to reuse (e.g. the cache was cleared while validators
+            # survived elsewhere): ask again, unconditionally, for the full body
+            response = self.session.get(url, headers={'Cache-Control': 'no-cache'}, timeout=self.timeout)
+            if response.status_code == 304:
+                raise requests.HTTPError(f"{url} answered 304 Not Modified without a cached copy", response=response)
+        response.raise_for_status()
+        self._writeCache(url, response.content, response.headers)
+        return response.content, True
+
+    def fetch_weeks(self, weeks):
+        # {week: (rows, changed)} with the downloads running concurrently
+        weeks = list(weeks)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(self.fetch_week, weeks))
+        return {week: (self.parser(body), changed) for week, (body, changed) in zip(weeks, results)}
+
+    def fetch_matchups(self, weeks):
+        # All rows of the given weeks in the matchup export layout, ready for LeagueData.append_week
+        rows = [row for week_rows, _ in self.fetch_weeks(weeks).values() for row in week_rows]
+        return pd.DataFrame(rows)
+
+    def update_league(self, league_data, weeks, onlyChanged=True):
+        # Feed fetched weeks straight into LeagueData; weeks the server reported unchanged are skipped
+        # unless the league has never seen them
+        loaded = league_data.loaded_weeks()
+        rows = [row for week, (week_rows, changed) in self.fetch_weeks(weeks).items()
+                if changed or not onlyChanged or week not in loaded for row in week_rows]
+        return league_data.append_week(rows) if rows else []
@@ -0,0 +1,43 @@
+from collections import OrderedDict
+
+from instrumentation import DISABLED
+
+class QueryCache:
+    # LRU cache of query results keyed by (query, week, team pair).
+    # A week of None marks a result that depends on every week, e.g. a season ranking.
+    def __init__(self, maxsize=1024, instrumentation=None):
+        self.maxsize = maxsize
+        self.instrumentation = instrumentation or DISABLED
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, query, week, team_pair, compute):
+        key = (query, week, team_pair)
+        if key in self._entries:
+            self.hits += 1
+            self.instrumentation.count('cache_hits')
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        self.instrumentation.count('cache_misses')
+        with self.instrumentation.stage('query.' + query):
+            value = compute()
+        if self.maxsize:
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate_weeks(self, weeks):
+        # Drop the entries of the changed weeks and every entry spanning all weeks
+        weeks = set(weeks)
+        for key in [key for key in self._entries if key[1] is None or key[1] in weeks]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,57 @@
+import asyncio
+
+# Marks the end of the stream in a stage queue
+_DONE = object()
+
+async def _fetch_stage(fetcher, weeks, queue, concurrency):
+    # concurrency workers share the weeks; a worker only starts its next download once the last one is
+    # queued, so a full queue holds fetches back
+    pending = iter(weeks)
+
+    async def worker():
+        for week in pending:
+            body, changed = await asyncio.to_thread(fetcher.fetch_week, week)
+            await queue.put((week, body, changed))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    await queue.put(_DONE)
+
+async def _parse_stage(fetcher, in_queue, out_queue):
+    while (item := await in_queue.get()) is not _DONE:
+        week, body, changed = item
+        rows = await asyncio.to_thread(fetcher.parser, body)
+        await out_queue.put((week, rows, changed))
+    await out_queue.put(_DONE)
+
+async def _update_stage(league_data, in_queue, results, onWeek):
+    # Single consumer, so LeagueData is only ever updated by one week at a time
+    loaded = league_data.loaded_weeks()
+    while (item := await in_queue.get()) is not _DONE:
+        week, rows, changed = item
+        if rows and (changed or week not in loaded):
+            league_data.append_week(rows)
+
+        results[week] = {
+            'wins': league_data.get_wins_ranking(week),
+            'average': league_data.get_average_stats_ranking(week),
+        }
+        if onWeek is not None:
+            onWeek(week, results[week])
+
+async def refresh_league(league_data, fetcher, weeks, concurrency=None, queueSize=4, onWeek=None):
+    # Fetch, parse, ingest and rank every week with the stages running concurrently.
+    # Returns {week: {'wins': get_wins_ranking(week), 'average': get_average_stats_ranking(week)}};
+    # onWeek(week, result) is called as soon as each week is ranked.
+    parse_queue = asyncio.Queue(maxsize=queueSize)
+    update_queue = asyncio.Queue(maxsize=queueSize)
+    results = {}
+
+    await asyncio.gather(
+        _fetch_stage(fetcher, list(weeks), parse_queue, concurrency or fetcher.workers),
+        _parse_stage(fetcher, parse_queue, update_queue),
+        _update_stage(league_data, update_queue, results, onWeek),
+    )
+    return dict(sorted(results.items()))
+
+def run_refresh(league_data, fetcher, weeks, **kwargs):
+    return asyncio.run(refresh_league(league_data, fetcher, weeks, **kwargs))
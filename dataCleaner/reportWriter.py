@@ -0,0 +1,139 @@
+import importlib.util
+import os
+
+from lazyImport import lazy_import
+
+np = lazy_import('numpy')
+pa = lazy_import('pyarrow')
+ipc = lazy_import('pyarrow.ipc')
+pq = lazy_import('pyarrow.parquet')
+
+EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+def _partition_dir(root, table, partition):
+    # Hive style root/<table>/league=<league>/week=<week>, so dataset readers can prune by league and week
+    parts = [root, table] + [f'{key}={value}' for key, value in partition]
+    return os.path.join(*parts)
+
+class ReportWriter:
+    # Buffers report rows per (table, partition) and writes them batchRows at a time as Parquet row groups
+    # or Arrow IPC record batches into one file per partition. Use as a context manager or call close().
+    def __init__(self, root, format='parquet', batchRows=65536):
+        if format not in EXTENSIONS:
+            raise ValueError(f"Unknown report format {format}, expected one of {', '.join(EXTENSIONS)}")
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ImportError("Columnar reports need pyarrow: pip install pyarrow")
+        self.root = root
+        self.format = format
+        self.batchRows = batchRows
+        self.paths = []
+        self._writers = {}
+        self._buffers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, table, partition, columns):
+        # columns maps column name to an equally long array; partition is a sequence of (key, value) pairs
+        key = (table, tuple(partition))
+        buffer = self._buffers.setdefault(key, [])
+        batch = pa.record_batch([pa.array(values) for values in columns.values()], names=list(columns))
+        if batch.num_rows:
+            buffer.append(batch)
+        if sum(batch.num_rows for batch in buffer) >= self.batchRows:
+            self.flush(table, partition)
+
+    def flush(self, table, partition):
+        # Write what is buffered for the partition now, e.g. once a partition is known to be complete
+        key = (table, tuple(partition))
+        batches = self._buffers.pop(key, [])
+        if not batches:
+            return
+        data = pa.Table.from_batches(batches)
+        writer = self._writers.get(key)
+        if writer is None:
+            writer = self._writers[key] = self._open(key, data.schema)
+        writer.write_table(data)
+
+    def _open(self, key, schema):
+        table, partition = key
+        directory = _partition_dir(self.root, table, partition)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'part-0.{EXTENSIONS[self.format]}')
+        self.paths.append(path)
+        if self.format == 'parquet':
+            return pq.ParquetWriter(path, schema)
+        return ipc.new_file(path, schema)
+
+    def close(self):
+        for table, partition in list(self._buffers):
+            self.flush(table, partition)
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+def write_head_to_head(writer, league, teamOrder, weekOrder, categoryWins, hasWeek, table='head_to_head'):
+    # Per week table of categories won and lost by every team against every opponent that also played,
+    # streamed one week of the (teams, teams, weeks) tensor at a time
+    teams = np.asarray(teamOrder, dtype=object)
+    n_teams = len(teamOrder)
+    team_codes, opponent_codes = np.divmod(np.arange(n_teams * n_teams), n_teams)
+    for w, week in enumerate(weekOrder):
+        played = (hasWeek[team_codes, w] & hasWeek[opponent_codes, w]) & (team_codes != opponent_codes)
+        rows, opponents = team_codes[played], opponent_codes[played]
+        partition = [('league', league), ('week', week)]
+        writer.write(table, partition, {
+            'Team': teams[rows],
+            'Opponent': teams[opponents],
+            'Won': np.asarray(categoryWins[rows, opponents, w]),
+            'Lost': np.asarray(categoryWins[opponents, rows, w]),
+        })
+        writer.flush(table, partition)
+
+def write_all_play(writer, league, teamOrder, categoryWins, hasWeek):
+    # Season all-play matrix: weekly matchups won, lost and tied by every team against every opponent
+    n_teams = len(teamOrder)
+    played = hasWeek[:, None, :] & hasWeek[None, :, :]
+    won = categoryWins
+    lost = categoryWins.transpose(1, 0, 2)
+    teams = np.asarray(teamOrder, dtype=object)
+    team_codes, opponent_codes = np.divmod(np.arange(n_teams * n_teams), n_teams)
+    pairs = team_codes != opponent_codes
+    writer.write('all_play', [('league', league)], {
+        'Team': teams[team_codes[pairs]],
+        'Opponent': teams[opponent_codes[pairs]],
+        'Wins': ((won > lost) & played).sum(axis=2).ravel()[pairs],
+        'Losses': ((won < lost) & played).sum(axis=2).ravel()[pairs],
+        'Ties': ((won == lost) & played).sum(axis=2).ravel()[pairs],
+    })
+
+def write_league_report(league_data, root, league, format='parquet', batchRows=65536):
+    # Weekly rankings, season rankings, the all-play matrix and the head-to-head tensor of one league.
+    # Returns the written file paths.
+    with ReportWriter(root, format, batchRows) as writer:
+        for week in sorted(league_data.loaded_weeks()):
+            wins = dict(league_data.get_wins_ranking(week))
+            wins_ranks = {team: rank for rank, team in enumerate(wins, start=1)}
+            averages = league_data.get_average_stats_ranking(week)
+            writer.write('rankings', [('league', league), ('week', week)], {
+                'Team': [team for team, _ in averages],
+                'Wins Rank': [wins_ranks[team] for team, _ in averages],
+                'Wins': [wins[team] for team, _ in averages],
+                'Average Rank': list(range(1, len(averages) + 1)),
+                'Average': [average for _, average in averages],
+            })
+
+        all_play = dict(league_data.get_all_play_ranking())
+        season = league_data.get_season_average_ranking()
+        writer.write('season_rankings', [('league', league)], {
+            'Team': [team for team, _ in season],
+            'Season Average': [average for _, average in season],
+            'All-Play Win %': [all_play.get(team) for team, _ in season],
+        })
+        write_all_play(writer, league, league_data.teamOrder, league_data.categoryWins, league_data.hasWeek)
+        write_head_to_head(writer, league, league_data.teamOrder, league_data.weekOrder,
+                           league_data.categoryWins, league_data.hasWeek)
+    return writer.paths
@@ -0,0 +1,57 @@
+from lazyImport import lazy_import
+
+np = lazy_import('numpy')
+
+def _prefix(values):
+    # cum[:, w] = sum of values[:, :w], so any window start:end of weeks is cum[:, end] - cum[:, start]
+    cum = np.zeros((values.shape[0], values.shape[1] + 1) + values.shape[2:])
+    np.cumsum(values, axis=1, out=cum[:, 1:])
+    return cum
+
+class SeasonMetrics:
+    # Per team prefix sums over the weeks of a league (weekOrder positions): all-play results, the weekly
+    # average of categories won and the stat lines. Window queries cost O(teams) whatever their length.
+    def __init__(self, categoryWins, hasWeek, statsArray, directions):
+        played = hasWeek[:, None, :] & hasWeek[None, :, :]
+        played[np.arange(played.shape[0]), np.arange(played.shape[0])] = False
+        won = categoryWins
+        lost = categoryWins.transpose(1, 0, 2)
+
+        games = played.sum(axis=1)
+        categories = np.where(played, won, 0).sum(axis=1)
+        self.directions = directions
+        self.wins = _prefix(((won > lost) & played).sum(axis=1))
+        self.ties = _prefix(((won == lost) & played).sum(axis=1))
+        self.games = _prefix(games)
+        # A week counts for the averages when the team and at least one opponent have a line
+        self.weeksPlayed = _prefix(games > 0)
+        self.weeklyAverage = _prefix(np.divide(categories, games, out=np.zeros(games.shape), where=games > 0))
+        self.stats = _prefix(np.where(hasWeek[..., None] & (games > 0)[..., None], statsArray, 0.0))
+
+    def window(self, cumulative, start, end):
+        return cumulative[:, end] - cumulative[:, start]
+
+    def all_play(self, start, end):
+        # (win %, games) per team with ties counting half, NaN where the team has no games in the window
+        games = self.window(self.games, start, end)
+        points = self.window(self.wins, start, end) + 0.5 * self.window(self.ties, start, end)
+        return np.divide(points, games, out=np.full(games.shape, np.nan), where=games > 0), games
+
+    def average(self, start, end):
+        # Mean over the played weeks of the average categories won per opponent
+        weeks = self.window(self.weeksPlayed, start, end)
+        total = self.window(self.weeklyAverage, start, end)
+        return np.divide(total, weeks, out=np.full(weeks.shape, np.nan), where=weeks > 0), weeks
+
+    def category_percentiles(self, start, end):
+        # (teams, stats) share of the other teams with a worse per-week average in every category, 0-100,
+        # ties counting half; NaN for teams without a played week in the window or without anyone to compare to
+        weeks = self.window(self.weeksPlayed, start, end)
+        active = weeks > 0
+        averages = self.window(self.stats, start, end)[active] / weeks[active, None] * self.directions
+        percentiles = np.full((len(weeks), len(self.directions)), np.nan)
+        if len(averages) > 1:
+            better = (averages[:, None] > averages[None, :]).sum(axis=1)
+            ties = (averages[:, None] == averages[None, :]).sum(axis=1) - 1
+            percentiles[active] = 100.0 * (better + 0.5 * ties) / (len(averages) - 1)
+        return percentiles
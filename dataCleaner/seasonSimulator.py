@@ -0,0 +1,118 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from headToHead import LOWER_IS_BETTER, category_directions
+from lazyImport import lazy_import
+from leagueData import STATS
+
+np = lazy_import('numpy')
+
+def round_robin_schedule(teams, weeks):
+    # Circle method pairing for when the real remaining schedule is not known; weeks is an iterable of week numbers
+    teams = list(teams)
+    if len(teams) % 2:
+        teams.append(None)
+    schedule = []
+    for round_number, week in enumerate(weeks):
+        rotation = round_number % (len(teams) - 1)
+        order = [teams[0]] + teams[1:][rotation:] + teams[1:][:rotation]
+        half = len(order) // 2
+        for team1, team2 in zip(order[:half], reversed(order[half:])):
+            if team1 is not None and team2 is not None:
+                schedule.append((week, team1, team2))
+    return schedule
+
+def _simulate_chunk(lines, counts, team1, team2, base_points, directions, seed, n_seasons):
+    # Plays n_seasons copies of the remaining schedule at once, every matchup drawing each team's week
+    # from its own observed weekly lines; returns (final position counts, summed points)
+    rng = np.random.default_rng(seed)
+    n_teams = len(base_points)
+
+    picks1 = rng.integers(0, counts[team1], size=(n_seasons, len(team1)))
+    picks2 = rng.integers(0, counts[team2], size=(n_seasons, len(team2)))
+    oriented1 = lines[team1, picks1] * directions
+    oriented2 = lines[team2, picks2] * directions
+    categories1 = (oriented1 > oriented2).sum(axis=-1, dtype=np.float32)
+    categories2 = (oriented2 > oriented1).sum(axis=-1, dtype=np.float32)
+
+    # Scatter matchup categories into per team season totals with one-hot matrix products
+    one_hot1 = np.eye(n_teams, dtype=np.float32)[team1]
+    one_hot2 = np.eye(n_teams, dtype=np.float32)[team2]
+    points = base_points + categories1 @ one_hot1 + categories2 @ one_hot2
+
+    # Final places, ties broken at random
+    order = np.argsort(-(points + rng.random(points.shape) * 0.5), axis=1)
+    positions = np.empty_like(order)
+    positions[np.arange(n_seasons)[:, None], order] = np.arange(n_teams)
+    position_counts = np.bincount((np.arange(n_teams) * n_teams + positions).ravel(), minlength=n_teams * n_teams)
+
+    return position_counts.reshape(n_teams, n_teams), points.sum(axis=0, dtype=np.float64)
+
+class SeasonSimulator:
+    def __init__(self, league_data, schedule, playoffSpots=6):
+        # schedule: remaining matchups as (week, team1, team2); standings are season category wins
+        self.teamOrder = list(league_data.teamOrder)
+        self.playoffSpots = playoffSpots
+        self.team1 = np.array([league_data.teamIndex[team1] for _, team1, _ in schedule], dtype=np.int64)
+        self.team2 = np.array([league_data.teamIndex[team2] for _, _, team2 in schedule], dtype=np.int64)
+        self.directions = category_directions(STATS, LOWER_IS_BETTER).astype(np.float32)
+
+        # Observed weekly lines of every team, padded to the team with most weeks
+        self.counts = league_data.hasWeek.sum(axis=1)
+        if len(self.teamOrder) and self.counts.min() == 0:
+            raise ValueError("Every team needs at least one played week to be simulated")
+        self.lines = np.zeros((len(self.teamOrder), self.counts.max(initial=0), len(STATS)), dtype=np.float32)
+        for i in range(len(self.teamOrder)):
+            self.lines[i, :self.counts[i]] = league_data.statsArray[i, league_data.hasWeek[i]]
+
+        self.currentPoints = self._current_points(league_data)
+        self.positionCounts = np.zeros((len(self.teamOrder), len(self.teamOrder)), dtype=np.int64)
+        self.pointsTotal = np.zeros(len(self.teamOrder))
+        self.seasons = 0
+
+    def _current_points(self, league_data):
+        # Categories won so far in the real matchups
+        points = np.zeros(len(self.teamOrder), dtype=np.float32)
+        matchups = league_data.dataFrame
+        if not len(self.teamOrder) or not len(matchups):
+            return points
+        team1 = matchups['Team 1 Name'].map(league_data.teamIndex).to_numpy()
+        team2 = matchups['Team 2 Name'].map(league_data.teamIndex).to_numpy()
+        weeks = matchups['Week'].map(league_data.weekIndex).to_numpy()
+        np.add.at(points, team1, league_data.categoryWins[team1, team2, weeks])
+        np.add.at(points, team2, league_data.categoryWins[team2, team1, weeks])
+        return points
+
+    def run(self, n_seasons, seed=None, workers=1, chunkSize=10000):
+        # workers=None uses one process per CPU
+        # Chunks get their own child seed, so results only depend on seed and chunkSize, not on workers
+        sizes = [min(chunkSize, n_seasons - start) for start in range(0, n_seasons, chunkSize)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        simulate = partial(_simulate_chunk, self.lines, self.counts, self.team1, self.team2,
+                           self.currentPoints, self.directions)
+
+        if workers == 1:
+            self._collect(map(simulate, seeds, sizes))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                self._collect(executor.map(simulate, seeds, sizes))
+
+        self.seasons += n_seasons
+        return self
+
+    def _collect(self, results):
+        for position_counts, points in results:
+            self.positionCounts += position_counts
+            self.pointsTotal += points
+
+    def get_playoff_odds_ranking(self):
+        odds = self.positionCounts[:, :self.playoffSpots].sum(axis=1) / max(self.seasons, 1)
+        return sorted(zip(self.teamOrder, odds.tolist()), key=lambda x: x[1], reverse=True)
+
+    def get_expected_points_ranking(self):
+        expected = self.pointsTotal / max(self.seasons, 1)
+        return sorted(zip(self.teamOrder, expected.tolist()), key=lambda x: x[1], reverse=True)
+
+    def get_final_position_odds(self, team_name):
+        # Probability of finishing in each place, first place first
+        return (self.positionCounts[self.teamOrder.index(team_name)] / max(self.seasons, 1)).tolist()
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from lazyImport import lazy_import
+
+np = lazy_import('numpy')
+
+# Bump when the layout of what gets stored changes so old snapshots are rebuilt
+SNAPSHOT_VERSION = 1
+
+def default_cache_dir(pathToCsv):
+    return os.path.join(os.path.dirname(os.path.abspath(pathToCsv)), '.snapshots')
+
+def snapshot_key(pathToCsv, stats, kind):
+    # Hash of the CSV contents, the stats list and what is stored, so any change invalidates the snapshot
+    digest = hashlib.sha256()
+    with open(pathToCsv, 'rb') as stream:
+        for chunk in iter(lambda: stream.read(1 << 20), b''):
+            digest.update(chunk)
+    digest.update(json.dumps([SNAPSHOT_VERSION, kind, list(stats)]).encode())
+    return digest.hexdigest()
+
+def _snapshot_prefix(pathToCsv, kind):
+    return f"{os.path.basename(pathToCsv)}-{kind}-"
+
+def load_snapshot(cacheDir, pathToCsv, stats, kind):
+    # Returns (arrays, meta) with every array memory-mapped, or None when there is no valid snapshot
+    key = snapshot_key(pathToCsv, stats, kind)
+    directory = os.path.join(cacheDir, _snapshot_prefix(pathToCsv, kind) + key[:16])
+    try:
+        with open(os.path.join(directory, 'meta.json'), 'r') as stream:
+            meta = json.load(stream)
+        if meta.get('key') != key:
+            return None
+        # Copy-on-write maps: callers may update arrays in memory without touching the files
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='c') for name in meta['arrays']}
+    except (OSError, ValueError, KeyError):
+        return None
+    return arrays, meta['data']
+
+def save_snapshot(cacheDir, pathToCsv, stats, kind, arrays, data):
+    key = snapshot_key(pathToCsv, stats, kind)
+    prefix = _snapshot_prefix(pathToCsv, kind)
+    directory = os.path.join(cacheDir, prefix + key[:16])
+    os.makedirs(cacheDir, exist_ok=True)
+
+    # Write into a temporary directory and rename it so readers never see a half written snapshot
+    staging = tempfile.mkdtemp(prefix='.tmp-', dir=cacheDir)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f'{name}.npy'), np.ascontiguousarray(array))
+        with open(os.path.join(staging, 'meta.json'), 'w') as stream:
+            json.dump({'key': key, 'arrays': list(arrays), 'data': data}, stream)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(staging, directory)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    # Drop snapshots of older versions of the same CSV
+    for entry in os.listdir(cacheDir):
+        if entry.startswith(prefix) and entry != os.path.basename(directory):
+            shutil.rmtree(os.path.join(cacheDir, entry), ignore_errors=True)
+
+def load_or_build(cacheDir, pathToCsv, stats, kind, build):
+    # build() returns (arrays, data) where data is JSON serialisable; a fresh build is saved for next time
+    snapshot = load_snapshot(cacheDir, pathToCsv, stats, kind)
+    if snapshot is not None:
+        return snapshot
+    arrays, data = build()
+    save_snapshot(cacheDir, pathToCsv, stats, kind, arrays, data)
+    return arrays, data
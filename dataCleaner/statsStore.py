@@ -0,0 +1,98 @@
+from collections.abc import Mapping
+
+from lazyImport import lazy_import
+
+np = lazy_import('numpy')
+
+class StatsStore:
+    # Interned team and week ids over one contiguous statsArray[team, week, stat], NaN where a team did not play
+    __slots__ = ('teamOrder', 'teamIndex', 'weekOrder', 'weekIndex', 'statsArray', 'hasWeek')
+
+    def __init__(self, teamOrder, weekOrder, numberOfStats):
+        self.teamOrder = list(teamOrder)
+        self.teamIndex = {team: i for i, team in enumerate(self.teamOrder)}
+        self.weekOrder = sorted(weekOrder)
+        self.weekIndex = {week: w for w, week in enumerate(self.weekOrder)}
+        self.statsArray = np.full((len(self.teamOrder), len(self.weekOrder), numberOfStats), np.nan)
+        self.hasWeek = np.zeros((len(self.teamOrder), len(self.weekOrder)), dtype=bool)
+
+    @classmethod
+    def from_lines(cls, teamOrder, team_codes, weeks, values):
+        # team_codes index teamOrder, weeks are week numbers and values has one row of stats per line
+        values = np.asarray(values, dtype=np.float64)
+        weeks = np.asarray(weeks)
+        store = cls(teamOrder, np.unique(weeks).tolist(), values.shape[-1])
+        week_codes = np.searchsorted(store.weekOrder, weeks)
+        store.statsArray[team_codes, week_codes] = values
+        store.hasWeek = ~np.isnan(store.statsArray).any(axis=-1)
+        return store
+
+class TeamWeekStats(Mapping):
+    # Read-only {team: {week: {stat: value}}} facade. It reads the arrays of its source (a StatsStore or
+    # LeagueData) on every access, so it stays valid when the source grows or replaces them.
+    __slots__ = ('_source', '_statIndex')
+
+    def __init__(self, source, stats):
+        self._source = source
+        self._statIndex = {stat: s for s, stat in enumerate(stats)}
+
+    def __getitem__(self, team):
+        return _TeamWeeks(self._source, self._source.teamIndex[team], self._statIndex)
+
+    def __iter__(self):
+        return iter(self._source.teamOrder)
+
+    def __len__(self):
+        return len(self._source.teamOrder)
+
+    def __contains__(self, team):
+        return team in self._source.teamIndex
+
+class _TeamWeeks(Mapping):
+    __slots__ = ('_source', '_team', '_statIndex')
+
+    def __init__(self, source, team, statIndex):
+        self._source = source
+        self._team = team
+        self._statIndex = statIndex
+
+    def _week(self, week):
+        w = self._source.weekIndex.get(week)
+        if w is None or not self._source.hasWeek[self._team, w]:
+            raise KeyError(week)
+        return w
+
+    def __getitem__(self, week):
+        return _StatLine(self._source, self._team, self._week(week), self._statIndex)
+
+    def __contains__(self, week):
+        try:
+            self._week(week)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __iter__(self):
+        weeks = self._source.weekOrder
+        return (weeks[w] for w in np.flatnonzero(self._source.hasWeek[self._team]))
+
+    def __len__(self):
+        return int(self._source.hasWeek[self._team].sum())
+
+class _StatLine(Mapping):
+    __slots__ = ('_source', '_team', '_week', '_statIndex')
+
+    def __init__(self, source, team, week, statIndex):
+        self._source = source
+        self._team = team
+        self._week = week
+        self._statIndex = statIndex
+
+    def __getitem__(self, stat):
+        return float(self._source.statsArray[self._team, self._week, self._statIndex[stat]])
+
+    def __iter__(self):
+        return iter(self._statIndex)
+
+    def __len__(self):
+        return len(self._statIndex)
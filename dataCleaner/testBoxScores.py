@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from boxScores import PLAYER_WEEK, aggregate_box_scores, as_box_scores, read_box_scores
+from leagueData import STATS, LeagueData
+from matchupData import load_team_weeks
+
+COUNTS = ['3PTM', 'PTS', 'REB', 'AST', 'ST', 'BLK', 'TO']
+
+def box_scores_for(team_weeks):
+    # Two players over two days per team-week whose totals give back the team-week line of test.csv.
+    # The players shoot very differently, so averaging their percentages would not.
+    rows = []
+    for line in team_weeks.to_dict('records'):
+        attempts = {'FGA': 1000.0, 'FTA': 500.0}
+        made = {'FGM': round(line['FG%'] * 1000), 'FTM': round(line['FT%'] * 500)}
+        shares = [(f"{line['Team']} guard", 0.7, 0.8), (f"{line['Team']} center", 0.3, 0.2)]
+        for day in range(2):
+            for player, made_share, attempt_share in shares:
+                date = pd.Timestamp('2023-10-24') + pd.Timedelta(days=7 * (line['Week'] - 1) + day)
+                row = {'Week': line['Week'], 'Date': date.strftime('%Y-%m-%d'),
+                       'Team': line['Team'], 'Player': player}
+                for stat in COUNTS:
+                    row[stat] = line[stat] * (0.6 if day == 0 else 0.4) * 0.5
+                row['FGM'] = made['FGM'] * made_share / 2
+                row['FGA'] = attempts['FGA'] * attempt_share / 2
+                row['FTM'] = made['FTM'] * made_share / 2
+                row['FTA'] = attempts['FTA'] * attempt_share / 2
+                rows.append(row)
+    return pd.DataFrame(rows)
+
+class TestBoxScores(unittest.TestCase):
+    def setUp(self):
+        self.team_weeks = load_team_weeks("test.csv", STATS)
+        self.box_scores = box_scores_for(self.team_weeks)
+
+    def test_aggregate_team_weeks(self):
+        team_weeks = aggregate_box_scores(self.box_scores, STATS)
+        expected = self.team_weeks.set_index(['Team', 'Week']).sort_index()
+        result = team_weeks.set_index(['Team', 'Week']).sort_index()
+        self.assertEqual(list(team_weeks.columns), ['Team', 'Week'] + STATS)
+        np.testing.assert_allclose(result[STATS].to_numpy(), expected[STATS].to_numpy())
+
+    def test_aggregate_player_weeks(self):
+        player_weeks = aggregate_box_scores(self.box_scores, ['FG%', 'PTS'], keys=PLAYER_WEEK)
+        self.assertEqual(len(player_weeks), 4 * 6 * 2)
+        guard = player_weeks[(player_weeks['Player'] == 'Team A guard') & (player_weeks['Week'] == 1)].iloc[0]
+        self.assertAlmostEqual(guard['FG%'], 450 * 0.7 / (1000 * 0.8))
+
+    def test_weeks_from_dates(self):
+        box_scores = self.box_scores.drop(columns='Week')
+        team_weeks = aggregate_box_scores(box_scores, STATS, seasonStart='2023-10-24')
+        self.assertEqual(sorted(team_weeks['Week'].unique().tolist()), [1, 2, 3, 4, 5, 6])
+        with self.assertRaises(ValueError):
+            aggregate_box_scores(box_scores, STATS)
+        with self.assertRaises(ValueError):
+            aggregate_box_scores(self.box_scores, ['Points'])
+
+    def test_read_box_scores(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "box_scores.csv")
+            self.box_scores.assign(Position='G').to_csv(path, index=False)
+            box_scores = read_box_scores(path)
+        self.assertNotIn('Position', box_scores.columns)
+        self.assertEqual(len(box_scores), len(self.box_scores))
+
+    def test_integer_box_scores(self):
+        # Counting columns given as ints, the usual case for DataFrames and dicts
+        rows = [
+            {'Week': 1, 'Team': 'Team A', 'Player': 'guard', 'FGM': 5, 'FGA': 10, 'FTM': 3, 'FTA': 4, 'PTS': 15},
+            {'Week': 1, 'Team': 'Team A', 'Player': 'center', 'FGM': 2, 'FGA': 3, 'FTM': 0, 'FTA': 0, 'PTS': 4},
+            {'Week': 1, 'Team': 'Team B', 'Player': 'guard', 'FGM': 4, 'FGA': 9, 'FTM': 0, 'FTA': 0, 'PTS': 8},
+        ]
+        for source in (rows, pd.DataFrame(rows)):
+            team_weeks = aggregate_box_scores(as_box_scores(source), ['FG%', 'FT%', 'PTS']).set_index('Team')
+            self.assertAlmostEqual(team_weeks.loc['Team A', 'FG%'], 7 / 13)
+            self.assertAlmostEqual(team_weeks.loc['Team A', 'FT%'], 3 / 4)
+            self.assertEqual(team_weeks.loc['Team B', 'FT%'], 0.0)
+
+        int_box_scores = self.box_scores.copy()
+        for stat in ['FGM', 'FGA', 'FTM', 'FTA'] + COUNTS:
+            int_box_scores[stat] = int_box_scores[stat].round().astype(np.int64)
+        league_data = LeagueData()
+        self.assertEqual(league_data.import_box_scores(int_box_scores.to_dict('records')), [1, 2, 3, 4, 5, 6])
+        team_a_week1 = int_box_scores[(int_box_scores['Team'] == 'Team A') & (int_box_scores['Week'] == 1)]
+        self.assertEqual(league_data.statsByTeamPerWeek['Team A'][1]['PTS'], team_a_week1['PTS'].sum())
+
+    def test_league_data(self):
+        league_data = LeagueData()
+        self.assertEqual(league_data.import_box_scores(self.box_scores), [1, 2, 3, 4, 5, 6])
+        expected = LeagueData()
+        expected.import_data("test.csv")
+
+        self.assertEqual(league_data.teamNames, expected.teamNames)
+        for team in expected.teamOrder:
+            for week in expected.weekOrder:
+                self.assertEqual(league_data.teamWeekResults[(team, week)], expected.teamWeekResults[(team, week)])
+        self.assertCountEqual(league_data.get_wins_ranking(3), expected.get_wins_ranking(3))
+
+        # Appending a changed week only replaces that week
+        week6 = self.box_scores[self.box_scores['Week'] == 6].assign(PTS=0.0)
+        self.assertEqual(league_data.append_box_scores(week6), [6])
+        self.assertEqual(league_data.statsByTeamPerWeek['Team A'][6]['PTS'], 0.0)
+        self.assertEqual(league_data.teamWeekResults[('Team A', 5)], expected.teamWeekResults[('Team A', 5)])
+
+if __name__ == "__main__":
+    unittest.main()
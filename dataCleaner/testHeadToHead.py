@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+
+from headToHead import category_directions, compare_categories, compare_rows
+
+class TestHeadToHead(unittest.TestCase):
+    def test_category_directions(self):
+        self.assertEqual(category_directions(['PTS', 'TO', 'REB']).tolist(), [1.0, -1.0, 1.0])
+
+    def test_compare_categories(self):
+        # Columns: PTS, TO. Team C has no line in the second week
+        stats = np.array([
+            [[100, 10], [90, 12]],
+            [[100, 12], [95, 8]],
+            [[80, 9], [np.nan, np.nan]],
+        ])
+        wins = compare_categories(stats, category_directions(['PTS', 'TO']))
+
+        self.assertEqual(wins.shape, (3, 3, 2))
+        self.assertEqual(wins[:, :, 0].tolist(), [[0, 1, 1], [0, 0, 1], [1, 1, 0]])
+        self.assertEqual(wins[:, :, 1].tolist(), [[0, 0, 0], [2, 0, 0], [0, 0, 0]])
+
+    def test_compare_rows(self):
+        # The rows of a team compared against everyone match its row and column of compare_categories
+        stats = np.random.default_rng(0).normal(size=(5, 4, 3))
+        stats[2, 1] = np.nan
+        directions = category_directions(['PTS', 'TO', 'REB'])
+        wins = compare_categories(stats, directions)
+        won, lost = compare_rows(stats[[1, 3]], stats, directions)
+
+        self.assertEqual(won.shape, (2, 5, 4))
+        self.assertEqual(won[0].tolist(), wins[1].tolist())
+        self.assertEqual(lost[0].tolist(), wins[:, 1].tolist())
+        self.assertEqual(won[1].tolist(), wins[3].tolist())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+
+from leagueBatch import find_matchup_csvs, run_batch
+from leagueData import LeagueData
+
+class TestLeagueBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.good = os.path.join(self.directory.name, "Yahoo-1.l.2-Matchup.csv")
+        shutil.copy("test.csv", self.good)
+        # A matchup export with a value that is not a number
+        self.broken = os.path.join(self.directory.name, "Yahoo-1.l.3-Matchup.csv")
+        matchups = pd.read_csv("test.csv", dtype=str)
+        matchups.loc[0, 'Team 1 PTS'] = 'ninety'
+        matchups.to_csv(self.broken, index=False)
+        # Not a matchup export
+        pd.DataFrame({'Note': ['draft day']}).to_csv(os.path.join(self.directory.name, "notes.csv"), index=False)
+        self.output = os.path.join(self.directory.name, "league_rankings.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_find_matchup_csvs(self):
+        self.assertEqual(find_matchup_csvs(self.directory.name), [self.good, self.broken])
+
+    def test_run_batch(self):
+        expected = LeagueData()
+        expected.import_data("test.csv")
+
+        # The second run finds the first report next to the exports and leaves it out
+        for _ in range(2):
+            report, failures = run_batch(self.directory.name, self.output, workers=1)
+            self.assertEqual(set(report['League']), {'1.l.2'})
+            self.assertEqual([path for path, _ in failures], [self.broken])
+            self.assertTrue(failures[0][1].startswith('ValueError'))
+
+        for week in expected.weeks:
+            ranking = report[report['Week'] == week]
+            self.assertCountEqual(zip(ranking['Team'], ranking['Wins']), expected.get_wins_ranking(week))
+        self.assertEqual(len(pd.read_csv(self.output)), len(report))
+
+if __name__ == "__main__":
+    unittest.main()
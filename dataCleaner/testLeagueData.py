@@ -1,8 +1,19 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 import unittest
 import pandas as pd
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
 from itertools import combinations
 
 # Import the class to be tested
+from instrumentation import Instrumentation
+import leagueData
 from leagueData import LeagueData
 
 STATS = ['FG%', 'FT%', '3PTM', 'PTS', 'REB', 'AST', 'ST', 'BLK', 'TO']
@@ -72,10 +83,271 @@ class TestLeagueData(unittest.TestCase):
                 for stat in STATS:
                     self.assertAlmostEqual(self.league_data.statsByTeamPerWeek[team][week][stat], expected_stats[team][week][stat])
 
+        def in_orientation(results, team_pair, week):
+            # Results of team_pair whichever way round the pair is stored, with the first team's wins first
+            if team_pair in results:
+                return tuple(results[team_pair][week])
+            return tuple(results[(team_pair[1], team_pair[0])][week])[::-1]
+
         for team_pair in combinations(self.league_data.teamNames, 2):
-            swapped_team_pair = (team_pair[1], team_pair[0])
             for week in self.league_data.weeks:
-                self.assertEqual(self.league_data.headToHeadResults[team_pair][week], expected_head_to_head[team_pair][week])
+                self.assertEqual(in_orientation(self.league_data.headToHeadResults, team_pair, week),
+                                 in_orientation(expected_head_to_head, team_pair, week))
+
+    def test_stats_view(self):
+        stats = self.league_data.statsByTeamPerWeek
+        self.assertCountEqual(stats, self.league_data.teamNames)
+        self.assertEqual(list(stats['Team A']), [1, 2, 3, 4, 5, 6])
+        self.assertNotIn(7, stats['Team A'])
+        self.assertEqual(dict(stats['Team B'][2])['PTS'], 72)
+        with self.assertRaises(TypeError):
+            stats['Team A'][1]['PTS'] = 0
+
+    def test_rankings_week(self):
+        expected_wins = [('Team B', 3), ('Team A', 2), ('Team D', 1), ('Team C', 0)]
+        self.assertEqual(self.league_data.get_wins_ranking(1), expected_wins)
+
+        expected_average = {'Team A': 19 / 3, 'Team B': 19 / 3, 'Team C': 4 / 3, 'Team D': 10 / 3}
+        for team_name, result in self.league_data.get_average_stats_ranking(1):
+            self.assertAlmostEqual(result, expected_average[team_name])
+
+        # Season ranking has one entry per team and week
+        self.assertEqual(len(self.league_data.get_average_stats_ranking()), 4 * 6)
+
+    def assertSameResults(self, league_data):
+        self.assertEqual(league_data.teamNames, self.league_data.teamNames)
+        self.assertEqual(league_data.weeks, self.league_data.weeks)
+        for week in self.league_data.weeks:
+            # Teams tied on the same result may come out in a different order
+            self.assertCountEqual(league_data.get_wins_ranking(week), self.league_data.get_wins_ranking(week))
+            self.assertCountEqual(league_data.get_average_stats_ranking(week), self.league_data.get_average_stats_ranking(week))
+        for (team1, team2), week_results in self.league_data.headToHeadResults.items():
+            if (team1, team2) in league_data.headToHeadResults:
+                self.assertEqual(league_data.headToHeadResults[(team1, team2)], week_results)
+            else:
+                swapped = {week: result[::-1] for week, result in week_results.items()}
+                self.assertEqual(league_data.headToHeadResults[(team2, team1)], swapped)
+
+    def test_append_week(self):
+        matchups = pd.read_csv("test.csv")
+        league_data = LeagueData()
+        self.assertEqual(league_data.append_week(matchups[matchups['Week'] <= 3]), [1, 2, 3])
+        self.assertEqual(league_data.append_week(matchups[matchups['Week'] > 3].to_dict('records')), [4, 5, 6])
+        self.assertSameResults(league_data)
+
+    def test_head_to_head_with_missing_week(self):
+        # Team B and Team C have no line in week 6
+        matchups = pd.read_csv("test.csv")
+        missing = (matchups['Week'] == 6) & (matchups['Team 1 Name'] == 'Team B')
+        league_data = LeagueData()
+        league_data.append_week(matchups[~missing])
+        self.assertEqual(league_data.weeks, {1, 2, 3, 4, 5, 6})
+
+        team1, team2, week_results, winsTeam1, winsTeam2, ties = league_data.get_head_to_head_summary('Team A', 'Team C')
+        self.assertEqual([week for week, _, _ in week_results], [1, 2, 3, 4, 5])
+        for week, result1, result2 in week_results:
+            self.assertEqual(league_data.teamWeekResults[(team1, week)][team2], (result1, result2))
+        self.assertEqual(winsTeam1 + winsTeam2 + ties, 5)
+        self.assertEqual(len(league_data.get_head_to_head_summary('Team A', 'Team D')[2]), 6)
+
+    def test_import_delta(self):
+        matchups = pd.read_csv("test.csv")
+        league_data = LeagueData()
+        league_data.append_week(matchups[matchups['Week'] <= 4])
+        self.assertEqual(league_data.import_delta("test.csv"), [5, 6])
+        self.assertEqual(league_data.import_delta("test.csv"), [])
+        self.assertSameResults(league_data)
+
+    def test_import_replaces_weeks(self):
+        # A second full import on the same object takes the weeks of the new file
+        with tempfile.TemporaryDirectory() as directory:
+            partial = os.path.join(directory, "partial.csv")
+            matchups = pd.read_csv("test.csv")
+            matchups[matchups['Week'] <= 3].to_csv(partial, index=False)
+            league_data = LeagueData()
+            league_data.import_data(partial)
+            self.assertEqual(league_data.weeks, {1, 2, 3})
+            league_data.import_data("test.csv")
+            self.assertSameResults(league_data)
+
+            fixed = LeagueData(numberOfWeeks=8)
+            fixed.import_data(partial)
+            fixed.import_data("test.csv")
+            self.assertEqual(fixed.weeks, set(range(1, 9)))
+
+    def test_menu_reimport(self):
+        # Import weeks 1-3, then the full file, then ask for the week 5 rankings
+        with tempfile.TemporaryDirectory() as directory:
+            partial = os.path.join(directory, "partial.csv")
+            full = os.path.join(directory, "test.csv")
+            matchups = pd.read_csv("test.csv")
+            matchups[matchups['Week'] <= 3].to_csv(partial, index=False)
+            shutil.copy("test.csv", full)
+            answers = ["1", partial, "1", full, "2", "1", "5", "4", "3"]
+            output = StringIO()
+            with mock.patch('builtins.input', side_effect=answers), redirect_stdout(output):
+                leagueData.main()
+        wins = output.getvalue().split("Ranking by wins on week 5:\n")[1].splitlines()
+        self.assertEqual([line.split(". ")[0] for line in wins[:4]], ["1", "2", "3", "4"])
+
+    def test_import_data_in_chunks(self):
+        # Chunks of 3 rows split some weeks across two chunks
+        league_data = LeagueData()
+        league_data.import_data("test.csv", chunksize=3)
+        self.assertSameResults(league_data)
+        self.assertEqual(len(league_data.dataFrame), 12)
+
+    def test_query_cache(self):
+        cache = self.league_data.queryCache
+        first = self.league_data.get_wins_ranking(2)
+        self.league_data.get_average_stats_ranking()
+        summary = self.league_data.get_head_to_head_summary('Team A', 'Team B')
+        hits = cache.hits
+        self.assertEqual(self.league_data.get_wins_ranking(2), first)
+        self.assertEqual(self.league_data.get_head_to_head_summary('Team B', 'Team A'), summary)
+        self.assertEqual(cache.hits, hits + 2)
+
+        # Replacing week 6 drops its entries and the season wide ones, week 2 stays cached
+        matchups = pd.read_csv("test.csv")
+        week6 = matchups[matchups['Week'] == 6].copy()
+        week6['Team 1 PTS'] = 0
+        self.league_data.append_week(week6)
+        self.assertIn(('wins_ranking', 2, None), cache._entries)
+        self.assertNotIn(('average_stats_ranking', None, None), cache._entries)
+        self.assertEqual(len(cache), 1)
+        self.assertNotEqual(self.league_data.get_head_to_head_summary('Team A', 'Team B'), summary)
+
+    def test_snapshot_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, "test.csv")
+            cache_dir = os.path.join(directory, "cache")
+            shutil.copy("test.csv", csv_path)
+
+            # First import writes the snapshot, second one is restored from it
+            LeagueData().import_data(csv_path, cacheDir=cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            league_data = LeagueData()
+            league_data.import_data(csv_path, cacheDir=cache_dir)
+            self.assertSameResults(league_data)
+            for team in league_data.teamNames:
+                for week in league_data.weeks:
+                    for stat in STATS:
+                        self.assertAlmostEqual(league_data.statsByTeamPerWeek[team][week][stat],
+                                               self.league_data.statsByTeamPerWeek[team][week][stat])
+
+            # Changing the CSV makes the snapshot stale, it gets rebuilt and replaces the old one
+            matchups = pd.read_csv(csv_path)
+            matchups[matchups['Week'] <= 5].to_csv(csv_path, index=False)
+            league_data = LeagueData()
+            league_data.import_data(csv_path, cacheDir=cache_dir)
+            self.assertEqual(league_data.weeks, {1, 2, 3, 4, 5})
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+    def test_instrumentation(self):
+        instrumentation = Instrumentation()
+        league_data = LeagueData(instrumentation=instrumentation)
+        league_data.import_data("test.csv")
+        league_data.get_wins_ranking(2)
+        league_data.get_wins_ranking(2)
+
+        summary = instrumentation.summary()
+        self.assertEqual(summary['counters']['rows_ingested'], 12)
+        self.assertEqual(summary['counters']['pairs_compared'], 6 * 6)
+        self.assertEqual(summary['counters']['cache_hits'], 1)
+        for stage in ('read_csv', 'stats_array', 'head_to_head', 'team_week_index', 'query.wins_ranking'):
+            self.assertEqual(summary['stages'][stage]['calls'], 1)
+        self.assertSameResults(league_data)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "summary.json")
+            instrumentation.write_summary(path, csv="test.csv")
+            with open(path) as stream:
+                self.assertEqual(json.load(stream)['csv'], "test.csv")
+
+        # Disabled instrumentation records nothing
+        self.assertEqual(self.league_data.instrumentation.summary(), {})
+
+    def test_what_if(self):
+        deltas = {'PTS': 40, 'TO': -3, 4: {'REB': -25}}
+        results = self.league_data.what_if('Team A', deltas)
+
+        # Same answers as importing the edited stat lines from scratch
+        matchups = pd.read_csv("test.csv")
+        for slot in ['Team 1', 'Team 2']:
+            team_rows = matchups[f'{slot} Name'] == 'Team A'
+            matchups.loc[team_rows, f'{slot} PTS'] += 40
+            matchups.loc[team_rows, f'{slot} TO'] -= 3
+            matchups.loc[team_rows & (matchups['Week'] == 4), f'{slot} REB'] -= 25
+        edited = LeagueData()
+        edited.append_week(matchups)
+
+        self.assertEqual(set(results), self.league_data.weeks)
+        for week, result in results.items():
+            self.assertEqual(result['average'][0], self.league_data._get_average_result_for_team_in_week('Team A', week))
+            self.assertAlmostEqual(result['average'][1], edited._get_average_result_for_team_in_week('Team A', week))
+            self.assertEqual(result['wins'], (self.league_data._get_wins_for_team_in_week('Team A', week),
+                                              edited._get_wins_for_team_in_week('Team A', week)))
+
+        # Batches score many scenarios at once and leave the stored results alone
+        averages, wins = self.league_data.what_if_batch('Team A', [{}, deltas] * 3, batchSize=4)
+        self.assertEqual(averages.shape, (6, 6))
+        self.assertEqual(wins[1].tolist(), [results[week]['wins'][1] for week in self.league_data.weekOrder])
+        self.assertEqual(wins[0].tolist(), [results[week]['wins'][0] for week in self.league_data.weekOrder])
+        self.assertSameResults(self.league_data)
+        with self.assertRaises(ValueError):
+            self.league_data.what_if('Team A', {'Steals': 1})
+
+    def all_play_by_brute_force(self, league_data, weeks):
+        points, games = {}, {}
+        for (team, week), results in league_data.teamWeekResults.items():
+            if week in weeks:
+                for won, lost in results.values():
+                    points[team] = points.get(team, 0) + (1 if won > lost else 0.5 if won == lost else 0)
+                    games[team] = games.get(team, 0) + 1
+        return {team: points[team] / games[team] for team in games}
+
+    def test_season_metrics(self):
+        league_data = self.league_data
+        season = {}
+        for team, week, result in league_data.get_average_stats_ranking():
+            season.setdefault(team, []).append(result)
+        ranking = league_data.get_season_average_ranking()
+        self.assertEqual([value for _, value in ranking], sorted((value for _, value in ranking), reverse=True))
+        for team, value in ranking:
+            self.assertAlmostEqual(value, sum(season[team]) / len(season[team]))
+
+        for ranking, weeks in [(league_data.get_all_play_ranking(), {1, 2, 3, 4, 5, 6}),
+                               (league_data.get_all_play_ranking(fromWeek=2, throughWeek=4), {2, 3, 4}),
+                               (league_data.get_form_ranking(2, throughWeek=5), {4, 5}),
+                               (league_data.get_form_ranking(3), {4, 5, 6})]:
+            expected = self.all_play_by_brute_force(league_data, weeks)
+            self.assertEqual(len(ranking), len(expected))
+            for team, value in ranking:
+                self.assertAlmostEqual(value, expected[team])
+
+        # The team with the best per-week average is at the 100th percentile, for TO that is the lowest average
+        percentiles = league_data.get_category_percentiles(throughWeek=3)
+        averages = {team: {stat: sum(league_data.statsByTeamPerWeek[team][week][stat] for week in (1, 2, 3)) / 3
+                           for stat in STATS} for team in league_data.teamOrder}
+        for stat in ['PTS', 'TO']:
+            best = (min if stat == 'TO' else max)(averages, key=lambda team: averages[team][stat])
+            self.assertEqual(percentiles[best][stat], 100.0)
+
+        # The prefix sums are rebuilt after new data comes in
+        matchups = pd.read_csv("test.csv")
+        week6 = matchups[matchups['Week'] == 6].copy()
+        week6['Team 1 PTS'] = 0
+        league_data.append_week(week6)
+        expected = self.all_play_by_brute_force(league_data, {1, 2, 3, 4, 5, 6})
+        for team, value in league_data.get_all_play_ranking():
+            self.assertAlmostEqual(value, expected[team])
+
+    def test_import_has_no_side_effects(self):
+        # Importing the analysis modules neither runs a report nor loads pandas/numpy
+        code = "import sys, leagueData, weeklyStats; print(sorted({'numpy', 'pandas'} & set(sys.modules)))"
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout, "[]\n")
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
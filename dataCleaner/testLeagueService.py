@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+import pandas as pd
+
+from leagueData import LeagueData
+from leagueService import LeagueService, ServiceError, make_server
+
+class TestLeagueService(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.directory, "Yahoo-1.l.2-Matchup.csv")
+        shutil.copy("test.csv", self.csv_path)
+        self.service = LeagueService([self.csv_path], checkInterval=0)
+        self.league_data = LeagueData()
+        self.league_data.import_data("test.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_queries(self):
+        self.assertEqual(self.service.handle('/leagues'), {'leagues': ['1.l.2']})
+        self.assertEqual(self.service.handle('/leagues/1.l.2')['weeks'], [1, 2, 3, 4, 5, 6])
+
+        wins = self.service.handle('/leagues/1.l.2/rankings/wins?week=2')
+        self.assertEqual([(row['team'], row['wins']) for row in wins['ranking']], self.league_data.get_wins_ranking(2))
+        season = self.service.handle('/leagues/1.l.2/rankings/average')
+        self.assertEqual(len(season['ranking']), 4 * 6)
+
+        head_to_head = self.service.handle('/leagues/1.l.2/head-to-head?team1=Team%20A&team2=Team%20B')
+        _, _, week_results, winsTeam1, winsTeam2, ties = self.league_data.get_head_to_head_summary('Team A', 'Team B')
+        self.assertEqual((head_to_head['winsTeam1'], head_to_head['winsTeam2'], head_to_head['ties']),
+                         (winsTeam1, winsTeam2, ties))
+        self.assertEqual(len(head_to_head['weeks']), len(week_results))
+
+        week = self.service.handle('/leagues/1.l.2/weeks/3')
+        self.assertEqual(week['stats']['Team A'], dict(self.league_data.statsByTeamPerWeek['Team A'][3]))
+        self.assertEqual(week['results']['Team A']['Team B']['won'],
+                         self.league_data.teamWeekResults[('Team A', 3)]['Team B'][0])
+
+        for url, status in [('/nope', 404), ('/leagues/9.l.9', 404), ('/leagues/1.l.2/rankings/wins', 400),
+                            ('/leagues/1.l.2/rankings/wins?week=x', 400), ('/leagues/1.l.2/weeks/40', 404),
+                            ('/leagues/1.l.2/head-to-head?team1=Team%20A&team2=Nobody', 404)]:
+            with self.assertRaises(ServiceError) as context:
+                self.service.handle(url)
+            self.assertEqual(context.exception.status, status)
+
+    def test_hot_reload(self):
+        league = self.service.leagues['1.l.2']
+        warm = league.leagueData
+        self.service.handle('/leagues/1.l.2/rankings/wins?week=2')
+        self.assertIs(league.leagueData, warm)
+
+        matchups = pd.read_csv(self.csv_path)
+        matchups[matchups['Week'] <= 5].to_csv(self.csv_path, index=False)
+        self.assertEqual(self.service.handle('/leagues/1.l.2')['weeks'], [1, 2, 3, 4, 5])
+        self.assertEqual(league.reloads, 2)
+
+        # A CSV that cannot be read keeps the last good import
+        with open(self.csv_path, 'w') as stream:
+            stream.write("broken")
+        description = self.service.handle('/leagues/1.l.2')
+        self.assertEqual(description['weeks'], [1, 2, 3, 4, 5])
+        self.assertIsNotNone(description['lastError'])
+
+    def test_startup_failures(self):
+        # An unreadable CSV is skipped and reported, the other leagues are served
+        broken = os.path.join(self.directory, "Yahoo-1.l.3-Matchup.csv")
+        with open(broken, 'w') as stream:
+            stream.write("broken")
+        service = LeagueService([self.csv_path, broken], checkInterval=0)
+        self.assertEqual(service.handle('/leagues'), {'leagues': ['1.l.2']})
+        self.assertEqual([path for path, _ in service.failures], [broken])
+
+        # Two CSVs of the same league cannot both be served
+        os.makedirs(os.path.join(self.directory, "copy"))
+        duplicate = os.path.join(self.directory, "copy", "Yahoo-1.l.2-Matchup.csv")
+        shutil.copy("test.csv", duplicate)
+        with self.assertRaisesRegex(ValueError, "1.l.2"):
+            LeagueService([self.csv_path, duplicate], checkInterval=0)
+
+    def test_http(self):
+        server = make_server(self.service, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            base = f'http://127.0.0.1:{server.server_address[1]}'
+            with urllib.request.urlopen(f'{base}/leagues/1.l.2/rankings/wins?week=2') as response:
+                self.assertEqual(response.headers['Content-Type'], 'application/json')
+                self.assertEqual(len(json.load(response)['ranking']), 4)
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                urllib.request.urlopen(f'{base}/leagues/9.l.9')
+            self.assertEqual(context.exception.code, 404)
+            self.assertEqual(json.load(context.exception), {'error': 'Unknown league 9.l.9'})
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pandas as pd
+
+from leagueData import LeagueData
+from matchupFetcher import STAT_IDS, MatchupFetcher, parse_scoreboard
+from refreshPipeline import run_refresh
+
+def scoreboard_payload(matchups):
+    # Yahoo scoreboard JSON for the rows of one week of a matchup export
+    entries = {}
+    for i, (_, row) in enumerate(matchups.iterrows()):
+        teams = {}
+        for t, slot in enumerate(['Team 1', 'Team 2']):
+            stats = [{'stat': {'stat_id': stat_id, 'value': str(row[f'{slot} {stat}'])}} for stat_id, stat in STAT_IDS.items()]
+            teams[str(t)] = {'team': [
+                [{'team_key': row[f'{slot} ID']}, {'name': row[f'{slot} Name']}],
+                {'team_stats': {'stats': stats}, 'team_points': {'total': str(row[f'{slot} Points'])}},
+            ]}
+        teams['count'] = 2
+        entries[str(i)] = {'matchup': {'week': str(row['Week']), '0': {'teams': teams}}}
+    entries['count'] = len(matchups)
+    league = [{'league_key': '428.l.17058'}, {'scoreboard': {'0': {'matchups': entries}}}]
+    return json.dumps({'fantasy_content': {'league': league}}).encode()
+
+class MockScoreboardHandler(BaseHTTPRequestHandler):
+    matchups = pd.read_csv("test.csv")
+    downloads = 0
+    cookies = []
+    delay = 0
+    # Requests answered 304 whatever their validators, like a proxy that still holds them
+    notModified = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).cookies.append(self.headers.get('Cookie'))
+        week = int(urlparse(self.path).path.rsplit('/', 1)[-1])
+        etag = f'"week-{week}"'
+        if self.headers.get('If-None-Match') == etag or type(self).notModified:
+            type(self).notModified = max(type(self).notModified - 1, 0)
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        time.sleep(self.delay)
+        body = scoreboard_payload(self.matchups[self.matchups['Week'] == week])
+        type(self).downloads += 1
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class TestMatchupFetcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), MockScoreboardHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_address[1]}/{{league}}/week/{{week}}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        MockScoreboardHandler.downloads = 0
+        MockScoreboardHandler.cookies = []
+        MockScoreboardHandler.delay = 0
+        MockScoreboardHandler.notModified = 0
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _fetcher(self, workers=4):
+        return MatchupFetcher('428.l.17058', cookies=[{'name': 'T', 'value': 'token'}],
+                              cacheDir=self.directory.name, urlTemplate=self.url, workers=workers)
+
+    def test_parse_scoreboard(self):
+        matchups = MockScoreboardHandler.matchups
+        rows = parse_scoreboard(scoreboard_payload(matchups[matchups['Week'] == 1]))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['Team 1 Name'], 'Team A')
+        self.assertAlmostEqual(rows[0]['Team 1 FG%'], 0.45)
+        self.assertEqual(rows[1]['Team 2 TO'], 13)
+
+    def test_fetch_feeds_league_data(self):
+        expected = LeagueData()
+        expected.import_data("test.csv")
+
+        league_data = LeagueData()
+        with self._fetcher() as fetcher:
+            self.assertEqual(fetcher.update_league(league_data, range(1, 7)), [1, 2, 3, 4, 5, 6])
+        for week in expected.weeks:
+            self.assertCountEqual(league_data.get_wins_ranking(week), expected.get_wins_ranking(week))
+        self.assertTrue(all('T=token' in cookie for cookie in MockScoreboardHandler.cookies))
+
+    def test_unchanged_weeks_are_not_downloaded_again(self):
+        league_data = LeagueData()
+        with self._fetcher() as fetcher:
+            fetcher.update_league(league_data, range(1, 7))
+        self.assertEqual(MockScoreboardHandler.downloads, 6)
+
+        # A new fetcher on the same cache gets 304s and leaves the league untouched
+        with self._fetcher() as fetcher:
+            self.assertEqual(fetcher.update_league(league_data, range(1, 7)), [])
+            self.assertEqual(len(fetcher.fetch_matchups(range(1, 7))), 12)
+        self.assertEqual(MockScoreboardHandler.downloads, 6)
+
+    def test_not_modified_without_cached_copy(self):
+        # A 304 for a week that is not in the cache is asked for again without validators
+        MockScoreboardHandler.notModified = 1
+        with self._fetcher() as fetcher:
+            body, changed = fetcher.fetch_week(1)
+        self.assertTrue(changed)
+        self.assertEqual(len(parse_scoreboard(body)), 2)
+        self.assertEqual(MockScoreboardHandler.downloads, 1)
+
+    def test_refresh_pipeline(self):
+        expected = LeagueData()
+        expected.import_data("test.csv")
+
+        # Six slow weeks fetched concurrently take about as long as one of them
+        MockScoreboardHandler.delay = 0.3
+        league_data = LeagueData()
+        ranked_weeks = []
+        start = time.perf_counter()
+        with self._fetcher(workers=6) as fetcher:
+            results = run_refresh(league_data, fetcher, range(1, 7), onWeek=lambda week, _: ranked_weeks.append(week))
+        self.assertLess(time.perf_counter() - start, 6 * 0.3)
+
+        self.assertCountEqual(ranked_weeks, [1, 2, 3, 4, 5, 6])
+        self.assertEqual(list(results), [1, 2, 3, 4, 5, 6])
+        for week in expected.weeks:
+            self.assertCountEqual(results[week]['wins'], expected.get_wins_ranking(week))
+            self.assertCountEqual(results[week]['average'], expected.get_average_stats_ranking(week))
+
+    def test_refresh_pipeline_backpressure(self):
+        # With a slow parser and one slot per queue, downloads wait for the parser instead of running ahead:
+        # at most one week being parsed, one queued and one held by the fetch worker
+        outstanding = []
+
+        def slow_parser(body):
+            time.sleep(0.1)
+            outstanding.append(MockScoreboardHandler.downloads - len(outstanding))
+            return parse_scoreboard(body)
+
+        with MatchupFetcher('428.l.17058', cookies=[{'name': 'T', 'value': 'token'}], cacheDir=self.directory.name,
+                            urlTemplate=self.url, workers=1, parser=slow_parser) as fetcher:
+            results = run_refresh(LeagueData(), fetcher, range(1, 7), queueSize=1)
+        self.assertEqual(list(results), [1, 2, 3, 4, 5, 6])
+        self.assertLessEqual(max(outstanding), 3)
+
+if __name__ == "__main__":
+    unittest.main()
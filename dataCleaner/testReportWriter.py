@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+from leagueData import LeagueData
+from reportWriter import ReportWriter, write_league_report
+
+try:
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    ds = pq = None
+
+class TestReportWriter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if ds is None:
+            raise unittest.SkipTest("pyarrow is not installed")
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.league_data = LeagueData()
+        self.league_data.import_data("test.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, table, format='parquet', **filters):
+        dataset = ds.dataset(os.path.join(self.directory.name, table), format=format, partitioning='hive')
+        expression = None
+        for name, value in filters.items():
+            condition = ds.field(name) == value
+            expression = condition if expression is None else expression & condition
+        return dataset.to_table(filter=expression).to_pandas()
+
+    def test_league_report(self):
+        paths = write_league_report(self.league_data, self.directory.name, '1.l.2')
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+        self.assertIn(os.path.join(self.directory.name, 'head_to_head', 'league=1.l.2', 'week=3', 'part-0.parquet'), paths)
+
+        rankings = self.read('rankings', week=2)
+        self.assertCountEqual(zip(rankings['Team'], rankings['Wins']), self.league_data.get_wins_ranking(2))
+        self.assertEqual(rankings['Average Rank'].tolist(), [1, 2, 3, 4])
+
+        head_to_head = self.read('head_to_head', league='1.l.2', week=4)
+        self.assertEqual(len(head_to_head), 4 * 3)
+        for row in head_to_head.itertuples():
+            self.assertEqual((row.Won, row.Lost), self.league_data.teamWeekResults[(row.Team, 4)][row.Opponent])
+        self.assertEqual(len(self.read('head_to_head')), 4 * 3 * 6)
+
+        all_play = self.read('all_play').set_index(['Team', 'Opponent'])
+        summary = self.league_data.get_head_to_head_summary('Team A', 'Team B')
+        team1, team2 = summary[:2]
+        self.assertEqual(tuple(all_play.loc[(team1, team2), ['Wins', 'Losses', 'Ties']]), tuple(summary[3:]))
+
+        season = self.read('season_rankings')
+        self.assertEqual(list(zip(season['Team'], season['Season Average'])), self.league_data.get_season_average_ranking())
+
+    def test_arrow_format(self):
+        write_league_report(self.league_data, self.directory.name, '1.l.2', format='arrow')
+        self.assertEqual(len(self.read('head_to_head', format='ipc', week=1)), 12)
+
+    def test_batched_writes(self):
+        with ReportWriter(self.directory.name, batchRows=2) as writer:
+            for value in range(5):
+                writer.write('values', [('league', 'x')], {'Value': [value]})
+            # Full batches are written as they fill up, the rest on close
+            self.assertEqual(len(writer.paths), 1)
+        parquet = pq.ParquetFile(writer.paths[0])
+        self.assertEqual(parquet.num_row_groups, 3)
+        self.assertEqual(parquet.read().column('Value').to_pylist(), [0, 1, 2, 3, 4])
+
+        with self.assertRaises(ValueError):
+            ReportWriter(self.directory.name, format='xlsx')
+
+if __name__ == "__main__":
+    unittest.main()
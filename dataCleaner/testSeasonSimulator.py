@@ -0,0 +1,44 @@
+import unittest
+import pandas as pd
+
+from leagueData import LeagueData
+from seasonSimulator import SeasonSimulator, round_robin_schedule
+
+class TestSeasonSimulator(unittest.TestCase):
+    def setUp(self):
+        # Weeks 1 to 3 are played, weeks 4 to 6 are left
+        matchups = pd.read_csv("test.csv")
+        self.league_data = LeagueData()
+        self.league_data.append_week(matchups[matchups['Week'] <= 3])
+        self.schedule = round_robin_schedule(sorted(self.league_data.teamNames), [4, 5, 6])
+
+    def test_round_robin_schedule(self):
+        self.assertEqual(len(self.schedule), 6)
+        for week in [4, 5, 6]:
+            teams = [team for matchup_week, team1, team2 in self.schedule if matchup_week == week for team in (team1, team2)]
+            self.assertCountEqual(teams, self.league_data.teamNames)
+        pairs = {frozenset((team1, team2)) for _, team1, team2 in self.schedule}
+        self.assertEqual(len(pairs), 6)
+
+    def test_run_is_seedable(self):
+        first = SeasonSimulator(self.league_data, self.schedule, playoffSpots=2).run(2000, seed=7, chunkSize=500)
+        second = SeasonSimulator(self.league_data, self.schedule, playoffSpots=2).run(2000, seed=7, chunkSize=500)
+        self.assertEqual(first.get_playoff_odds_ranking(), second.get_playoff_odds_ranking())
+
+        # Two playoff spots are handed out every season
+        self.assertAlmostEqual(sum(odds for _, odds in first.get_playoff_odds_ranking()), 2)
+        for team in self.league_data.teamNames:
+            self.assertAlmostEqual(sum(first.get_final_position_odds(team)), 1)
+
+    def test_current_points(self):
+        simulator = SeasonSimulator(self.league_data, [], playoffSpots=2).run(10, seed=0)
+        expected = {team: 0 for team in self.league_data.teamNames}
+        matchups = pd.read_csv("test.csv")
+        for _, row in matchups[matchups['Week'] <= 3].iterrows():
+            result = self.league_data.teamWeekResults[(row['Team 1 Name'], row['Week'])][row['Team 2 Name']]
+            expected[row['Team 1 Name']] += result[0]
+            expected[row['Team 2 Name']] += result[1]
+        self.assertCountEqual(simulator.get_expected_points_ranking(), expected.items())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,18 +1,16 @@
-import pandas as pd
+import argparse
 
-STATS = ['Points', 'FG%', 'FT%', '3PTM', 'PTS', 'REB', 'AST', 'ST', 'BLK', 'TO']
-
-def compare_team_positions(rankings, team1, team2):
+from headToHead import LOWER_IS_BETTER, category_directions, compare_categories
+from instrumentation import Instrumentation
+from lazyImport import lazy_import
+from matchupData import league_key, melt_matchups, read_matchups
+from reportWriter import ReportWriter, write_head_to_head
+from snapshotCache import default_cache_dir, load_or_build
+from statsStore import StatsStore, TeamWeekStats
 
-    team1_count = sum(rankings[stat].index(team1) < rankings[stat].index(team2) for stat in rankings)
-    team2_count = sum(rankings[stat].index(team2) < rankings[stat].index(team1) for stat in rankings)
+np = lazy_import('numpy')
 
-    if team1_count > team2_count:
-        return team1
-    elif team2_count > team1_count:
-        return team2
-    else:
-        return "Tie"
+STATS = ['Points', 'FG%', 'FT%', '3PTM', 'PTS', 'REB', 'AST', 'ST', 'BLK', 'TO']
 
 def get_rankings(team_data, week):
 
@@ -29,17 +27,25 @@ def get_rankings(team_data, week):
 
     return rankings
 
+def get_rank_positions(rankings, team_names):
+    # Place of every team in every stat ranking, computed once per week; NaN for teams that did not play
+    team_order = list(team_names)
+    team_index = {team: i for i, team in enumerate(team_order)}
+    positions = np.full((len(team_order), len(rankings)), np.nan)
+
+    for column, ranked_teams in enumerate(rankings.values()):
+        positions[[team_index[team] for team in ranked_teams], column] = np.arange(len(ranked_teams))
+
+    return team_order, positions
+
 def getAllWins(rankings, team_names):
-    winningSets = {team: set() for team in team_names}
+    team_order, positions = get_rank_positions(rankings, team_names)
 
-    for team in team_names:
-        for other_team in team_names:
-            if team == other_team:
-                continue
+    # Stats where each team is ranked ahead of each other team, all pairs at once (a lower position is better)
+    stats_ahead = compare_categories(positions, -np.ones(positions.shape[-1]))
+    beats = stats_ahead > stats_ahead.T
 
-            better_team = compare_team_positions(rankings, team, other_team)
-            if better_team == team:
-                winningSets[team].add(other_team)
+    winningSets = {team: {team_order[j] for j in np.flatnonzero(beats[i])} for i, team in enumerate(team_order)}
 
     return winningSets
 
@@ -58,132 +64,128 @@ def get_team_wins_summary(rankings, team_names):
     return team_wins_summary
 
 # Replace 'your_file.csv' with the actual path to your CSV file
-file_path = 'Yahoo-428.l.17058-Matchup.csv'
-
-# Read the CSV file into a pandas DataFrame
-df = pd.read_csv(file_path)
-
-team_names = set(df['Team 1 Name'].unique()) | set(df['Team 2 Name'].unique())
-team_data = {team: {} for team in team_names}
-weeks = set(df['Week'].unique())
-stats_names = {'Points', 'FG%', 'FT%', '3PTM', 'PTS', 'REB', 'AST', 'ST', 'BLK', 'TO'}
-
-# Iterate through rows in the DataFrame and populate the dictionary
-for index, row in df.iterrows():
-    team1 = row['Team 1 Name']
-    team2 = row['Team 2 Name']
-    week = row['Week']
-
-    # Initialize the team's dictionary for the week if it doesn't exist
-    if week not in team_data[team1]:
-        team_data[team1][week] = {}
-    if week not in team_data[team2]:
-        team_data[team2][week] = {}
-
-    # Populate the dictionary with stats for each team in each week
-    team_data[team1][week] = {
-        'Points': row['Team 1 Points'],
-        'FG%': row['Team 1 FG%'],
-        'FT%': row['Team 1 FT%'],
-        '3PTM': row['Team 1 3PTM'],
-        'PTS': row['Team 1 PTS'],
-        'REB': row['Team 1 REB'],
-        'AST': row['Team 1 AST'],
-        'ST': row['Team 1 ST'],
-        'BLK': row['Team 1 BLK'],
-        'TO': row['Team 1 TO'],
-    }
-
-    team_data[team2][week] = {
-        'Points': row['Team 2 Points'],
-        'FG%': row['Team 2 FG%'],
-        'FT%': row['Team 2 FT%'],
-        '3PTM': row['Team 2 3PTM'],
-        'PTS': row['Team 2 PTS'],
-        'REB': row['Team 2 REB'],
-        'AST': row['Team 2 AST'],
-        'ST': row['Team 2 ST'],
-        'BLK': row['Team 2 BLK'],
-        'TO': row['Team 2 TO'],
+DEFAULT_CSV = 'Yahoo-428.l.17058-Matchup.csv'
+
+def _parse_team_weeks(file_path):
+    # Read only the needed columns and stack both teams of every matchup into one row per team and week
+    df = read_matchups(file_path, STATS)
+    teams = list(set(df['Team 1 Name'].unique()) | set(df['Team 2 Name'].unique()))
+    team_weeks = melt_matchups(df, STATS)
+    arrays = {
+        'teams': team_weeks['Team'].map({team: i for i, team in enumerate(teams)}).to_numpy(dtype=np.int64),
+        'weeks': team_weeks['Week'].to_numpy(dtype=np.int64),
+        'stats': team_weeks[STATS].to_numpy(dtype=np.float64),
     }
+    return arrays, {'teamNames': teams}
 
 def _list_of_oponents(team_name, team_names):
     return [opponent_team for opponent_team in team_names if opponent_team != team_name]
 
+def run_report(file_path=DEFAULT_CSV, reportDir=None, reportFormat='parquet'):
+    # With a reportDir the weekly wins and the head-to-head tensor are also written there, see reportWriter.py
+    writer = ReportWriter(reportDir, reportFormat) if reportDir else None
+    league = league_key(file_path)
+    # Warm runs memory-map the parsed lines instead of reading the CSV again
+    # DATACLEANER_INSTRUMENT=timers[,profile][,memory] prints a JSON run summary at the end
+    instrumentation = Instrumentation.from_environment().start()
+    with instrumentation.stage('load'):
+        arrays, data = load_or_build(default_cache_dir(file_path), file_path, STATS, 'weeklyStats',
+                                     lambda: _parse_team_weeks(file_path))
+        store = StatsStore.from_lines(data['teamNames'], arrays['teams'], arrays['weeks'], arrays['stats'])
+    instrumentation.count('rows_ingested', len(arrays['teams']))
+
+    team_names = set(data['teamNames'])
+    # Read-only team_data[team][week][stat] view over the store's (team, week, stat) array
+    team_data = TeamWeekStats(store, STATS)
+    weeks = set(store.weekOrder)
+
+    # Print the result as a dictionary
+    #print(team_data)
 
-# Print the result as a dictionary
-#print(team_data)
+    for week in weeks:
+        with instrumentation.stage('weekly_rankings'):
+            rankings = get_rankings(team_data, week)
+            teamWinsRanking = get_team_wins_summary(rankings, team_names)
+        print()
+        print("Setmana " + str(week) + ":")
+        for team, wins in teamWinsRanking:
+            print(team + " " + str(wins))
+        if writer is not None:
+            writer.write('weekly_wins', [('league', league), ('week', week)], {
+                'Team': [team for team, _ in teamWinsRanking],
+                'Wins': [wins for _, wins in teamWinsRanking],
+            })
+
+    # Number of stat comparisons won by each team against every opponent in every week, from the shared kernel
+    week_order = store.weekOrder
+    team_index = store.teamIndex
+    with instrumentation.stage('head_to_head'):
+        category_wins = compare_categories(store.statsArray, category_directions(STATS, LOWER_IS_BETTER))
+    n_teams, n_weeks = store.statsArray.shape[:2]
+    instrumentation.count('pairs_compared', n_teams * (n_teams - 1) // 2 * n_weeks)
+
+    team_wins_per_week_against_opponents = {
+        team: {
+            opponent: {week: int(category_wins[team_index[team], team_index[opponent], w]) for w, week in enumerate(week_order)}
+            for opponent in team_names if opponent != team
+        }
+        for team in team_names
+    }
 
-for week in weeks:
-    rankings = get_rankings(team_data, week)
-    teamWinsRanking = get_team_wins_summary(rankings, team_names)
-    print()
-    print("Setmana " + str(week) + ":")
-    for team, wins in teamWinsRanking:
-        print(team + " " + str(wins))
+    # Display the number of stat comparisons won by each team against every opponent for each week
+    for team, opponent_wins_per_week in team_wins_per_week_against_opponents.items():
+        for opponent, wins_per_week in opponent_wins_per_week.items():
+            print(f"{team} vs {opponent}: {wins_per_week}")
 
-# Initialize a dictionary to store the number of stat comparisons won by each team per week against every opponent
-team_wins_per_week_against_opponents = {team: {opponent: {week: 0 for week in weeks} for opponent in team_names if opponent != team} for team in team_names}
+    # Initialize dictionaries to store total wins and average wins for each team against every opponent
+    total_wins_vs_opponent = {team: {opponent: 0 for opponent in team_names if opponent != team} for team in team_names}
+    total_wins_per_week = {team: {week: 0 for week in weeks} for team in team_names}
 
-# Iterate through weeks, teams, and opponents to compare stats
-for week in weeks:
+    # Iterate through teams and opponents to accumulate wins
     for team in team_names:
-        # Skip teams that don't have data for the current week
-        if week not in team_data[team]:
-            continue
-
-        team_stats = team_data[team][week]
-
-        # Compare stats with every possible opponent
         for opponent in _list_of_oponents(team, team_names):
-            opponent_stats = team_data[opponent][week]
-
-            # Count the number of stat comparisons won by the team against the opponent for the current week
-            comparisons_won = 0
-
-            # Add a comparison for turnovers where the team with less TO wins
-            if team_stats['TO'] < opponent_stats['TO']:
-                comparisons_won += 1
-
-            # Add comparisons for other stats where the team with greater values wins
-            comparisons_won += sum(1 for stat in stats_names if team_stats[stat] > opponent_stats[stat] and stat != 'TO')
-
-            team_wins_per_week_against_opponents[team][opponent][week] = comparisons_won
-
-# Display the number of stat comparisons won by each team against every opponent for each week
-for team, opponent_wins_per_week in team_wins_per_week_against_opponents.items():
-    for opponent, wins_per_week in opponent_wins_per_week.items():
-        print(f"{team} vs {opponent}: {wins_per_week}")
+            total_wins_vs_opponent[team][opponent] = sum(team_wins_per_week_against_opponents[team][opponent].values())
 
-# Initialize dictionaries to store total wins and average wins for each team against every opponent
-total_wins_vs_opponent = {team: {opponent: 0 for opponent in team_names if opponent != team} for team in team_names}
-total_wins_per_week = {team: {week: 0 for week in weeks} for team in team_names}
+        for week in weeks:
+            total_wins_per_week[team][week] = sum(opponent_values[week] for opponent_values in team_wins_per_week_against_opponents[team].values())
 
-# Iterate through teams and opponents to accumulate wins
-for team in team_names:
-    for opponent in _list_of_oponents(team, team_names):
-        total_wins_vs_opponent[team][opponent] = sum(team_wins_per_week_against_opponents[team][opponent].values())
+    #Media de victorias de toda la temporada
+    for team in team_names:
+        total_wins = sum(total_wins_vs_opponent[team].values())
+        average_wins = total_wins/(len(team_names)*len(weeks))
+        print(team + " " + str(average_wins))
 
     for week in weeks:
-        total_wins_per_week[team][week] = sum(opponent_values[week] for opponent_values in team_wins_per_week_against_opponents[team].values())
-
-#Media de victorias de toda la temporada
-for team in team_names:
-    total_wins = sum(total_wins_vs_opponent[team].values())
-    average_wins = total_wins/(len(team_names)*len(weeks))
-    print(team + " " + str(average_wins))
-
-for week in weeks:
-    weekRanking = []
-    
-    for team in team_names:
-        total_wins = 0
-        
-        for opponent in _list_of_oponents(team, team_names):
-            total_wins += team_wins_per_week_against_opponents[team][opponent][week]
-        weekRanking.append([team, total_wins])
-    weekRanking.sort(key=lambda x: x[1], reverse=True)
-    print()
-    print("Setmana " + str(week))
-    for [team, wins] in weekRanking:
-        print(team + ": " + str(wins/15.0))
\ No newline at end of file
+        weekRanking = []
+
+        for team in team_names:
+            total_wins = 0
+
+            for opponent in _list_of_oponents(team, team_names):
+                total_wins += team_wins_per_week_against_opponents[team][opponent][week]
+            weekRanking.append([team, total_wins])
+        weekRanking.sort(key=lambda x: x[1], reverse=True)
+        print()
+        print("Setmana " + str(week))
+        for [team, wins] in weekRanking:
+            print(team + ": " + str(wins/15.0))
+
+    if writer is not None:
+        with instrumentation.stage('write_report'):
+            # weeklyStats also counts the matchup Points category, so its tensor gets its own table
+            write_head_to_head(writer, league, store.teamOrder, week_order, category_wins, store.hasWeek,
+                               table='weekly_head_to_head')
+            writer.close()
+
+    instrumentation.count('teams', len(team_names))
+    instrumentation.count('weeks', len(weeks))
+    instrumentation.write_summary(script='weeklyStats', csv=file_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Weekly all-play wins of every team in a Yahoo matchup CSV")
+    parser.add_argument('csv', nargs='?', default=DEFAULT_CSV, help="matchup export")
+    parser.add_argument('--report-dir', default=None, help="also write the report tables under this directory")
+    parser.add_argument('--report-format', choices=['parquet', 'arrow'], default='parquet')
+    args = parser.parse_args()
+
+    run_report(args.csv, args.report_dir, args.report_format)
@@ -1,11 +1,20 @@
 import os
 import yaml
-import time
+from functools import lru_cache
 
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 
+WEBSITE_URL = 'https://login.yahoo.com/'
+# Seconds to wait for a page element before giving up
+WAIT_TIMEOUT = 10
+
 def _current_directory():
     return os.path.dirname(os.path.abspath(__file__))
 
@@ -19,43 +28,58 @@ def _loadSettings():
         
     return settings
 
-def _accessWebsite():
-    
-    WEBSITE_URL = 'https://login.yahoo.com/'
+@lru_cache(maxsize=None)
+def _chromeDriverPath():
+    # Resolving and downloading the driver is slow, do it once per process
+    return ChromeDriverManager().install()
+
+def _newDriver(headless=False):
     chrome_options = webdriver.ChromeOptions()
-    driver = webdriver.Chrome(ChromeDriverManager().install(), chrome_options=chrome_options)
-    driver.get(WEBSITE_URL)
-    time.sleep(2)
+    if headless:
+        chrome_options.add_argument('--headless=new')
+        chrome_options.add_argument('--window-size=1280,1024')
+    return webdriver.Chrome(service=Service(_chromeDriverPath()), options=chrome_options)
+
+def _waitFor(driver, locator, timeout=WAIT_TIMEOUT):
+    return WebDriverWait(driver, timeout).until(expected_conditions.element_to_be_clickable(locator))
+
+def _accessWebsite(driver=None, url=WEBSITE_URL):
+    
+    driver = driver or _newDriver()
+    driver.get(url)
+    _waitFor(driver, (By.NAME, "username"))
     
     return driver
 
 def _inputUsername(driver, userName):
 
-    usernameBox = driver.find_element_by_name("username")
+    usernameBox = _waitFor(driver, (By.NAME, "username"))
     usernameBox.send_keys(userName)
-    driver.find_element_by_id("login-signin").send_keys(Keys.RETURN)
-    time.sleep(2)
+    driver.find_element(By.ID, "login-signin").send_keys(Keys.RETURN)
 
 def _inputPassword(driver, password):
 
     try:
-        passwordBox = driver.find_element_by_name("password")
-        passwordBox.send_keys(settings['password'])
-        driver.find_element_by_id("login-signin").send_keys(Keys.RETURN)
+        passwordBox = _waitFor(driver, (By.NAME, "password"))
 
-    except:
+    except TimeoutException:
         print("I can't find the password box, please, resolve captcha")
         input('Press Enter to continue after resolving captcha.\n')
-        password = driver.find_element_by_name("password")
-        password.send_keys(settings['password'])
-        driver.find_element_by_id("login-signin").send_keys(Keys.RETURN)
+        passwordBox = driver.find_element(By.NAME, "password")
+
+    passwordBox.send_keys(password)
+    driver.find_element(By.ID, "login-signin").send_keys(Keys.RETURN)
+    # Logged in once the password form is gone
+    WebDriverWait(driver, WAIT_TIMEOUT).until(expected_conditions.staleness_of(passwordBox))
 
-def login():
+def login(driver=None, url=WEBSITE_URL, settings=None):
 
-    settings = _loadSettings()
-    driver = _accessWebsite()
+    settings = settings or _loadSettings()
+    driver = _accessWebsite(driver, url)
     _inputUsername(driver, settings['user'])
     _inputPassword(driver, settings['password'])
 
+    return driver
+
 if __name__ == "__main__":
-    login()
\ No newline at end of file
+    login()
@@ -0,0 +1,137 @@
+import json
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from selenium.common.exceptions import WebDriverException
+
+from login import WEBSITE_URL, _current_directory, _loadSettings, _newDriver, login
+
+# Page that needs an authenticated session, used to check whether restored cookies are still valid
+CHECK_URL = 'https://basketball.fantasysports.yahoo.com/'
+
+def default_cookie_file():
+    return os.path.join(_current_directory(), '.cookies.json')
+
+def load_cookies(cookieFile):
+    try:
+        with open(cookieFile, 'r') as stream:
+            return json.load(stream)
+    except (OSError, ValueError):
+        return []
+
+def save_cookies(cookieFile, cookies):
+    # Write next to the target and rename so a concurrent reader never sees a partial file.
+    # The cookies authenticate the Yahoo account, so only the owner may read them; a staging file left
+    # behind by an earlier run is removed first, as an existing file keeps its permissions.
+    staging = f'{cookieFile}.tmp'
+    try:
+        os.remove(staging)
+    except FileNotFoundError:
+        pass
+    with os.fdopen(os.open(staging, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as stream:
+        json.dump(cookies, stream)
+    os.replace(staging, cookieFile)
+
+class SessionPool:
+    # Keeps up to size authenticated headless WebDriver sessions and hands them out for reuse.
+    # Cookies of the last login are persisted so new sessions, also in later runs, skip the login form.
+    def __init__(self, size=2, settings=None, cookieFile=None, loginUrl=WEBSITE_URL, checkUrl=CHECK_URL,
+                 headless=True, driverFactory=None):
+        self.size = size
+        self.settings = settings
+        self.cookieFile = cookieFile or default_cookie_file()
+        self.loginUrl = loginUrl
+        self.checkUrl = checkUrl
+        self.driverFactory = driverFactory or (lambda: _newDriver(headless=headless))
+
+        self._idle = queue.LifoQueue()
+        self._drivers = []
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _isLoggedIn(self, driver):
+        # Protected pages redirect to the login page when the session is not valid
+        driver.get(self.checkUrl)
+        return not driver.current_url.startswith(self.loginUrl)
+
+    def _newSession(self):
+        driver = self.driverFactory()
+        try:
+            cookies = load_cookies(self.cookieFile)
+            if cookies:
+                # Cookies can only be added for the domain of the page currently loaded
+                driver.get(self.checkUrl)
+                for cookie in cookies:
+                    try:
+                        driver.add_cookie(cookie)
+                    except WebDriverException:
+                        continue
+
+            if not cookies or not self._isLoggedIn(driver):
+                login(driver, self.loginUrl, self.settings or _loadSettings())
+                self.saveCookies(driver)
+        except Exception:
+            driver.quit()
+            raise
+        return driver
+
+    def saveCookies(self, driver):
+        save_cookies(self.cookieFile, driver.get_cookies())
+
+    def cookies(self):
+        # Cookies of the last authenticated session, e.g. for plain HTTP requests
+        return load_cookies(self.cookieFile)
+
+    def acquire(self, timeout=None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if not create:
+            # Every session is in use, wait for one to come back
+            try:
+                return self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"All {self.size} sessions of the pool are in use, none came back within {timeout}s")
+
+        try:
+            driver = self._newSession()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        with self._lock:
+            self._drivers.append(driver)
+        return driver
+
+    def release(self, driver):
+        self._idle.put(driver)
+
+    @contextmanager
+    def session(self, timeout=None):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+            self._created = 0
+            self._idle = queue.LifoQueue()
+        for driver in drivers:
+            driver.quit()
@@ -0,0 +1,149 @@
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from selenium.common.exceptions import WebDriverException
+
+from login import _newDriver
+from sessionPool import SessionPool, load_cookies, save_cookies
+
+SETTINGS = {'user': 'tester', 'password': 'secret'}
+
+LOGIN_PAGE = b"""<html><body><form action="/password" method="get">
+<input name="username"><button id="login-signin" type="submit">Next</button></form></body></html>"""
+
+PASSWORD_PAGE = b"""<html><body><form action="/session" method="post">
+<input name="password" type="password"><button id="login-signin" type="submit">Sign in</button></form></body></html>"""
+
+class StandInLoginHandler(BaseHTTPRequestHandler):
+    # Two step login form like Yahoo's: username, then password, then a session cookie
+    logins = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b'', headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/login/':
+            self._send(200, LOGIN_PAGE)
+        elif path == '/password':
+            self._send(200, PASSWORD_PAGE)
+        elif path == '/home':
+            if 'session=valid' in self.headers.get('Cookie', ''):
+                self._send(200, b'<html><body>Welcome</body></html>')
+            else:
+                self._send(302, headers=[('Location', '/login/')])
+        else:
+            self._send(404)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        if form.get('password') == [SETTINGS['password']]:
+            type(self).logins += 1
+            self._send(302, headers=[('Set-Cookie', 'session=valid; Path=/'), ('Location', '/home')])
+        else:
+            self._send(302, headers=[('Location', '/login/')])
+
+class TestSessionPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            _newDriver(headless=True).quit()
+        except (WebDriverException, OSError, ValueError) as error:
+            raise unittest.SkipTest(f"Chrome is not available: {error}")
+
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInLoginHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        StandInLoginHandler.logins = 0
+        self.directory = tempfile.TemporaryDirectory()
+        self.cookie_file = os.path.join(self.directory.name, 'cookies.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _pool(self, size):
+        return SessionPool(size=size, settings=SETTINGS, cookieFile=self.cookie_file,
+                           loginUrl=f'{self.base_url}/login/', checkUrl=f'{self.base_url}/home')
+
+    def test_sessions_are_reused(self):
+        with self._pool(size=1) as pool:
+            with pool.session() as driver:
+                first = driver
+                self.assertIn('Welcome', driver.page_source)
+            with pool.session() as driver:
+                self.assertIs(driver, first)
+        self.assertEqual(StandInLoginHandler.logins, 1)
+        self.assertTrue(any(cookie['name'] == 'session' for cookie in load_cookies(self.cookie_file)))
+
+    def test_persisted_cookies_skip_login(self):
+        with self._pool(size=1) as pool:
+            pool.acquire()
+        with self._pool(size=2) as pool:
+            pool.acquire()
+            pool.acquire()
+        self.assertEqual(StandInLoginHandler.logins, 1)
+
+class StandInDriver:
+    # Enough of a WebDriver for a session restored from cookies, no browser needed
+    current_url = 'https://example.com/home'
+
+    def get(self, url):
+        pass
+
+    def add_cookie(self, cookie):
+        pass
+
+    def get_cookies(self):
+        return [{'name': 'session', 'value': 'valid'}]
+
+    def quit(self):
+        pass
+
+class TestSessionPoolWithoutBrowser(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cookie_file = os.path.join(self.directory.name, 'cookies.json')
+        save_cookies(self.cookie_file, [{'name': 'session', 'value': 'valid'}])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_exhausted_pool_times_out(self):
+        with SessionPool(size=1, cookieFile=self.cookie_file, loginUrl='https://example.com/login/',
+                         driverFactory=StandInDriver) as pool:
+            pool.acquire()
+            with self.assertRaisesRegex(TimeoutError, "All 1 sessions.*0.05s"):
+                pool.acquire(timeout=0.05)
+
+    @unittest.skipIf(os.name != 'posix', "POSIX file permissions")
+    def test_cookie_file_is_private(self):
+        previous = os.umask(0o022)
+        try:
+            save_cookies(self.cookie_file, [{'name': 'session', 'value': 'valid'}])
+        finally:
+            os.umask(previous)
+        self.assertEqual(os.stat(self.cookie_file).st_mode & 0o777, 0o600)
+        self.assertEqual(load_cookies(self.cookie_file), [{'name': 'session', 'value': 'valid'}])
+
+if __name__ == "__main__":
+    unittest.main()